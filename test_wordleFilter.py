@@ -0,0 +1,31 @@
+# The vectorized filter (wordleFilter.matches) and the solver's incremental narrowing of its remaining rows
+# must keep exactly the words the original per-word check (wordleSolver.word_in) keeps
+# Run with `python -m pytest -q`
+
+import random
+import numpy
+import pytest
+from wordleGame import score_guesses
+from wordleSolver import wordleSolver
+
+@pytest.mark.parametrize('n_letters', [5, 8, 10])
+def test_filter_matches_word_in(n_letters):
+    solver = wordleSolver(n_letters)
+    word_filter = solver.start_state['word_filter']
+    words = list(word_filter.words)
+    rng = random.Random(n_letters)
+    for game in range(30):
+        solver.reset()
+        target = rng.choice(words)
+        for turn in range(6):
+            # Mix guesses from the whole corpus with guesses that are still possible
+            remaining = solver.remaining_words()
+            guess = rng.choice(words) if turn % 2 == 0 or not len(remaining) else rng.choice(list(remaining))
+            response = score_guesses([guess], [target], as_strings=True)[0]
+            solver.process_guess(guess, list(response))
+            expected = [i for i, w in enumerate(words) if solver.word_in([w])]
+            constraints = solver.constraints()
+            assert list(numpy.flatnonzero(word_filter.matches(**constraints))) == expected
+            assert list(solver.rows) == expected
+            if response == '+' * n_letters:
+                break
@@ -0,0 +1,100 @@
+# Microbenchmarks for the solver's hot paths
+# Run with `python wordleBenchmark.py`. Each benchmark compares a fast path against the original pandas version
+
+import subprocess
+import sys
+import time
+from wordleSolver import wordleSolver
+from wordleEval import evaluate
+
+# Best of `repeat` wall times for fn() in seconds
+def best_time(fn, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+# Times update_state (vectorized) against update_state_pandas on the full starting corpus
+# and after a first guess narrows it, and checks both produce the same feature columns
+def bench_scoring(n_letters_options: list = [5, 8, 10], repeat: int = 3):
+    print(f"{'n_letters':>9} {'words':>7} {'pandas (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_letters in n_letters_options:
+        solver = wordleSolver(n_letters)
+        start_words = solver.possible_words[['word', 'freq']].copy()
+
+        def run(update):
+            solver.possible_words = start_words.copy()
+            update()
+            return solver.possible_words
+
+        pandas_time = best_time(lambda: run(solver.update_state_pandas), repeat)
+        pandas_words = solver.possible_words
+        vector_time = best_time(lambda: run(solver.update_state), repeat)
+        vector_words = solver.possible_words
+        for col in ['letter_score_by_word', 'letter_score_by_freq', 'letter_score_pos_perc', 'letter_score_pos_freq', 'distinct_letters']:
+            if not ((pandas_words[col] - vector_words[col]).abs() < 1e-9).all():
+                print(f"  WARNING: {col} differs between the pandas and vectorized paths")
+        print(f"{n_letters:>9} {len(start_words):>7} {pandas_time:>11.3f} {vector_time:>15.4f} {pandas_time / vector_time:>7.0f}x")
+
+# Per turn cost of ranking by entropy / expected_remaining, in hard mode and not, on the full starting corpus
+def bench_information(n_letters_options: list = [5, 8, 10], repeat: int = 3):
+    print(f"{'n_letters':>9} {'sort_on':>18} {'hard_mode':>9} {'guesses':>7} {'answers':>7} {'seconds':>8}")
+    for n_letters in n_letters_options:
+        solver = wordleSolver(n_letters)
+        for sort_on in ['entropy', 'expected_remaining']:
+            for hard_mode in [True, False]:
+                seconds = best_time(lambda: solver.next_guess(sort_on=sort_on, hard_mode=hard_mode), repeat)
+                timing = solver.rank_timing
+                print(f"{n_letters:>9} {sort_on:>18} {str(hard_mode):>9} {timing['guesses']:>7} {timing['answers']:>7} {seconds:>8.3f}")
+
+# The standard whole corpus numbers (see wordleEval): every one of the top answers played once
+def bench_evaluation(n_letters_options: list = [5, 8, 10]):
+    print(f"{'n_letters':>9} {'answers':>7} {'mean':>6} {'p95':>4} {'max':>4} {'fail > 6':>8} {'seconds':>8}")
+    for n_letters in n_letters_options:
+        result = evaluate(n_letters)
+        print(f"{n_letters:>9} {result['games']:>7} {result['mean_turns']:>6.3f} {result['p95_turns']:>4.0f} {result['max_turns']:>4} "
+              f"{result['failure_rate']:>8.2%} {result['seconds']:>8.1f}")
+
+# Cold start costs, each measured in a fresh interpreter so nothing is already imported or cached in memory:
+# importing the modules, building the first game / solver and building another one (the per-game cost)
+STARTUP_SNIPPET = '''
+import time
+start = time.perf_counter()
+from wordleGame import wordleGame
+from wordleSolver import wordleSolver
+from wordleEval import evaluate
+imported = time.perf_counter()
+wordleGame({n_letters})
+first_game = time.perf_counter()
+wordleGame({n_letters})
+second_game = time.perf_counter()
+wordleSolver({n_letters})
+first_solver = time.perf_counter()
+wordleSolver({n_letters})
+second_solver = time.perf_counter()
+print(imported - start, first_game - imported, second_game - first_game, first_solver - second_game, second_solver - first_solver)
+'''
+
+def bench_startup(n_letters_options: list = [5, 8, 10], repeat: int = 3):
+    print(f"{'n_letters':>9} {'import':>8} {'1st game':>9} {'game':>8} {'1st solver':>11} {'solver':>8}")
+    for n_letters in n_letters_options:
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-c', STARTUP_SNIPPET.format(n_letters=n_letters)],
+                                 capture_output=True, text=True, check=True).stdout
+            runs.append([float(t) for t in out.split()])
+        best = [min(times) for times in zip(*runs)]
+        print(f"{n_letters:>9} {best[0]:>8.3f} {best[1]:>9.3f} {best[2]:>8.4f} {best[3]:>11.3f} {best[4]:>8.4f}")
+
+
+if __name__ == '__main__':
+    print("---- Feature scoring: update_state vs update_state_pandas ----")
+    bench_scoring()
+    print("\n---- Guess ranking: next_guess(sort_on='entropy' / 'expected_remaining') ----")
+    bench_information()
+    print("\n---- Start up: seconds to import, build the first and then another wordleGame / wordleSolver ----")
+    bench_startup()
+    print("\n---- Whole corpus evaluation: the solver against every one of the top 10,000 answers ----")
+    bench_evaluation()
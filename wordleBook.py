@@ -0,0 +1,71 @@
+# Opening book for the wordle solver
+# For a fixed corpus and model parameters the solver is deterministic, so its next guess depends only on
+# the guesses and responses so far. Simulations replay the same few hundred early-game histories thousands
+# of times, so the book remembers the guess for each history in an LRU, optionally backed by a pickle on disk.
+# Keys include the corpus hash and model params, so changing either never returns a stale guess
+
+from collections import OrderedDict
+import os
+import pickle
+
+class openingBook:
+    def __init__(self, max_size: int = 100000, path: str = None):
+        self.max_size = max_size
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    # Everything the solver's next guess depends on
+    @staticmethod
+    def key(n_letters: int, corpus_hash: str, sort_on: str, model_params: dict, hard_mode: bool, guesses: list) -> tuple:
+        return (n_letters, corpus_hash, sort_on, tuple(sorted(model_params.items())), hard_mode,
+                tuple((g['guess'], ''.join(g['response'])) for g in guesses))
+
+    def get(self, key: tuple) -> str:
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, guess: str):
+        self.entries[key] = guess
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    # Drop everything, e.g. after editing the corpus pickles in place
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def load(self):
+        with open(self.path, 'rb') as f:
+            for key, guess in pickle.load(f).items():
+                self.put(key, guess)
+
+    # Merge with whatever is already on disk (another process may have saved since we loaded) and write atomically
+    def save(self):
+        entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                entries = pickle.load(f)
+        entries.update(self.entries)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def opening_book_path(n_letters: int, corpus_hash: str) -> str:
+    return f"./start_words/opening_book_{n_letters}_letters_{corpus_hash[:12]}.pkl"
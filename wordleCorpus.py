@@ -0,0 +1,124 @@
+# Word lists for each word length, shared by wordleGame and wordleSolver
+# valid_words are every alphabetic word of that length in wordfreq (what the game accepts and picks answers from)
+# start_words are the words the solver considers (the most common START_WORDS of them).
+# Each list is loaded lazily the first time a length is used and kept in memory for the rest of the process.
+# valid_words for every length come from one artifact built by a single scan of the wordfreq dictionary:
+# all alphabetic words bucketed by length (frequency order within each length) as one utf-8 byte blob, with
+# word offsets per length and byte offsets per word, so a length is a slice (see all_lengths_path).
+# start_words are stored per length as a fixed width utf-8 byte array plus a float32 frequency array
+
+import os
+import numpy
+
+# arbitrary to take top 20000 words. I chose not to use the wordle corpus so this limits to words people know
+START_WORDS = 20000
+
+class wordleCorpus:
+    def __init__(self, words: list, freq: numpy.ndarray):
+        self.words = words
+        self.freq = freq
+
+    def __len__(self):
+        return len(self.words)
+
+    def save(self, path: str):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        numpy.savez(tmp_path, words=numpy.array([w.encode('utf-8') for w in self.words]), freq=self.freq)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with numpy.load(path) as data:
+            return cls(numpy.char.decode(data['words'], 'utf-8').tolist(), data['freq'])
+
+
+_corpora = {}
+
+# Layout: lengths (word lengths present), offsets (words of lengths[i] are rows offsets[i]:offsets[i + 1]),
+# chars (utf-8 bytes of every word) with char_offsets (word j is chars[char_offsets[j]:char_offsets[j + 1]]) and freq
+def all_lengths_path() -> str:
+    return "./start_words/valid_words_all_lengths.npz"
+
+def start_words_path(n_letters: int) -> str:
+    return f"./start_words/start_words_{n_letters}_letters.npz"
+
+# All alphabetic words of n_letters in frequency order (removes non-alpha words like don't)
+def valid_words(n_letters: int) -> wordleCorpus:
+    key = ('valid', n_letters)
+    if key not in _corpora:
+        _corpora[key] = length_slice(all_lengths(), n_letters)
+    return _corpora[key]
+
+# The all lengths artifact as a dict of arrays, scanning wordfreq and writing it the first time
+def all_lengths() -> dict:
+    if 'all_lengths' not in _corpora:
+        path = all_lengths_path()
+        if not os.path.exists(path):
+            save_all_lengths(scan_all_lengths(), path)
+        with numpy.load(path) as data:
+            _corpora['all_lengths'] = {name: data[name] for name in data.files}
+    return _corpora['all_lengths']
+
+def length_slice(index: dict, n_letters: int) -> wordleCorpus:
+    position = numpy.searchsorted(index['lengths'], n_letters)
+    if position == len(index['lengths']) or index['lengths'][position] != n_letters:
+        return wordleCorpus([], numpy.zeros(0, dtype=numpy.float32))
+    start, end = index['offsets'][position], index['offsets'][position + 1]
+    chars, char_offsets = index['chars'], index['char_offsets']
+    blob = chars[char_offsets[start]:char_offsets[end]].tobytes()
+    bounds = char_offsets[start:end + 1] - char_offsets[start]
+    return wordleCorpus([blob[a:b].decode('utf-8') for a, b in zip(bounds[:-1], bounds[1:])], index['freq'][start:end])
+
+# The solver's starting words. Converts the old pandas pickle if there is one so existing corpora are kept
+def start_words(n_letters: int) -> wordleCorpus:
+    key = ('start', n_letters)
+    if key not in _corpora:
+        _corpora[key] = load_or_build(start_words_path(n_letters), lambda: build_start_words(n_letters))
+    return _corpora[key]
+
+def load_or_build(path: str, build) -> wordleCorpus:
+    if os.path.exists(path):
+        return wordleCorpus.load(path)
+    corpus = build()
+    corpus.save(path)
+    return corpus
+
+# One pass over the wordfreq dictionary, bucketing every alphabetic word by length
+def scan_all_lengths() -> dict:
+    from wordfreq import get_frequency_dict
+    buckets = {}
+    for word, freq in get_frequency_dict('en', wordlist='best').items():
+        if word.isalpha():
+            buckets.setdefault(len(word), []).append((word, freq))
+    lengths = sorted(buckets)
+    words = [w for n in lengths for w in buckets[n]]
+    encoded = [w.encode('utf-8') for w, _ in words]
+    return {'lengths': numpy.array(lengths, dtype=numpy.int64),
+            'offsets': numpy.cumsum([0] + [len(buckets[n]) for n in lengths]),
+            'chars': numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8),
+            'char_offsets': numpy.cumsum([0] + [len(e) for e in encoded]),
+            'freq': numpy.array([f for _, f in words], dtype=numpy.float32)}
+
+def save_all_lengths(index: dict, path: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    numpy.savez(tmp_path, **index)
+    os.replace(tmp_path, path)
+
+def build_start_words(n_letters: int) -> wordleCorpus:
+    pickle_path = f"./start_words/start_words_{n_letters}_letters.pkl"
+    if os.path.exists(pickle_path):
+        import pandas
+        words = pandas.read_pickle(pickle_path)
+        return wordleCorpus(words['word'].tolist(), words['freq'].to_numpy(dtype=numpy.float32))
+    corpus = valid_words(n_letters)
+    return wordleCorpus(corpus.words[:START_WORDS], corpus.freq[:START_WORDS])
+
+
+# Build (or rebuild) the all lengths artifact up front, e.g. before starting a pool of simulator workers
+if __name__ == '__main__':
+    import time
+    start = time.perf_counter()
+    index = scan_all_lengths()
+    save_all_lengths(index, all_lengths_path())
+    print(f"{int(index['offsets'][-1])} words of {len(index['lengths'])} lengths written to {all_lengths_path()} "
+          f"in {time.perf_counter() - start:.1f}s")
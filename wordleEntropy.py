@@ -0,0 +1,31 @@
+# Ranks guesses by how much they are expected to shrink the remaining possible words
+# For each candidate guess the remaining words are bucketed by the response they would give.
+# entropy is the information (in bits) of that bucket distribution, expected_remaining is the
+# expected size of the bucket the answer lands in. Bucketing is done for a whole batch of guesses at once
+# by sorting each row of response codes, so memory stays at guesses x answers even for 3**10 patterns
+
+import numpy
+
+INFORMATION_SORTS = ['entropy', 'expected_remaining']
+
+# Every non-empty bucket in a (n_guesses, n_answers) response code matrix as (guess row, bucket size)
+def bucket_sizes(codes: numpy.ndarray) -> tuple:
+    ordered = numpy.sort(codes, axis=1)
+    starts = numpy.ones(ordered.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    flat_starts = numpy.flatnonzero(starts)
+    sizes = numpy.diff(numpy.append(flat_starts, ordered.size))
+    return flat_starts // ordered.shape[1], sizes
+
+# Entropy (bits) and expected remaining words for each guess row of a response code matrix
+def information_scores(codes: numpy.ndarray) -> tuple:
+    n_guesses, n_answers = codes.shape
+    guess_rows, sizes = bucket_sizes(codes)
+    p = sizes / n_answers
+    entropy = numpy.bincount(guess_rows, weights=-p * numpy.log2(p), minlength=n_guesses)
+    expected_remaining = numpy.bincount(guess_rows, weights=sizes.astype(numpy.float64) ** 2, minlength=n_guesses) / n_answers
+    return entropy, expected_remaining
+
+# Indices of the largest `n` values, highest first. Ties keep the earlier index first
+def top_indices(values: numpy.ndarray, n: int) -> numpy.ndarray:
+    return numpy.argsort(-values, kind='stable')[:n]
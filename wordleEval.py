@@ -0,0 +1,80 @@
+# Whole corpus evaluation
+# Plays the solver against every answer in the top_k most common words exactly once (or a seeded sample of them)
+# instead of random games, so two runs of the same solver give the same numbers and strategy changes can be
+# compared without thousands of noisy games. All answers are played together: answers that got the same responses
+# so far share one solver state, so each distinct state picks its guess once and the responses for every answer
+# in it come from one vectorized pattern_codes call. A full pass over the 10,000 answers takes seconds
+# Run with `python wordleEval.py [n_letters]` for the standard benchmark numbers
+
+import random
+import sys
+import time
+import numpy
+from wordleCorpus import valid_words
+from wordleFeedback import decode_response, pattern_codes
+from wordleFilter import build_alphabet, encode_words
+from wordleSolver import DEFAULT_MODEL_PARAMS, wordleSolver
+
+# wordleGame picks answers from the 10,000 most common words
+TOP_ANSWERS = 10000
+
+# The answers to evaluate against, in frequency order: all of the top_k most common words, or a fixed sample of them
+def answer_words(n_letters: int, top_k: int = TOP_ANSWERS, sample: int = None, seed: int = 0) -> list:
+    words = valid_words(n_letters).words[:top_k]
+    if sample is not None and sample < len(words):
+        picked = sorted(random.Random(seed).sample(range(len(words)), sample))
+        words = [words[i] for i in picked]
+    return words
+
+# Turns the solver takes to find each answer, 0 where it didn't within max_turns (or ran out of possible words)
+def play_answers(solver: wordleSolver, answers: list, sort_on: str = 'model_rank', model_params: dict = DEFAULT_MODEL_PARAMS,
+                 hard_mode: bool = True, start_word: str = None, max_turns: int = 20) -> numpy.ndarray:
+    n_letters = solver.n_letters
+    solver.reset()
+    alphabet = build_alphabet(list(solver.remaining_words()) + list(answers) + [start_word or ''])
+    encoded = encode_words(answers, alphabet, n_letters)
+    win = 3 ** n_letters - 1
+    turns = numpy.zeros(len(answers), dtype=int)
+    # (solver state, indices of the answers in it)
+    active = [(solver, numpy.arange(len(answers)))]
+    for turn in range(1, max_turns + 1):
+        next_active = []
+        for state, answer_ids in active:
+            if len(state.rows) == 0:
+                continue
+            guess = start_word if turn == 1 and start_word else state.next_guess(sort_on, model_params, hard_mode)
+            codes = pattern_codes(encode_words([guess], alphabet, n_letters), encoded[answer_ids])
+            turns[answer_ids[codes == win]] = turn
+            for code in numpy.unique(codes[codes != win]):
+                child = state.clone()
+                child.process_guess(guess, decode_response(code, n_letters))
+                next_active.append((child, answer_ids[codes == code]))
+        active = next_active
+    return turns
+
+# Summary of a set of game lengths: mean, p95 and max turns of the games that finished, and the share that
+# failed (took more than fail_after turns or never finished)
+def summarize_turns(turns: numpy.ndarray, fail_after: int = 6) -> dict:
+    solved = turns[turns > 0]
+    return {'games': len(turns),
+            'mean_turns': solved.mean() if len(solved) else numpy.nan,
+            'p95_turns': numpy.percentile(solved, 95) if len(solved) else numpy.nan,
+            'max_turns': solved.max() if len(solved) else 0,
+            'failure_rate': ((turns == 0) | (turns > fail_after)).mean() if len(turns) else numpy.nan,
+            'unfinished': int((turns == 0).sum())}
+
+def evaluate(n_letters: int = 5, top_k: int = TOP_ANSWERS, sample: int = None, seed: int = 0, sort_on: str = 'model_rank',
+             model_params: dict = DEFAULT_MODEL_PARAMS, hard_mode: bool = True, start_word: str = None,
+             max_turns: int = 20, fail_after: int = 6, solver: wordleSolver = None) -> dict:
+    start = time.perf_counter()
+    answers = answer_words(n_letters, top_k, sample, seed)
+    turns = play_answers(solver or wordleSolver(n_letters), answers, sort_on, model_params, hard_mode, start_word, max_turns)
+    return {**summarize_turns(turns, fail_after), 'seconds': time.perf_counter() - start, 'answers': answers, 'turns': turns}
+
+
+if __name__ == '__main__':
+    n_letters = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    result = evaluate(n_letters)
+    print(f"{n_letters} letters, {result['games']} answers in {result['seconds']:.1f}s")
+    print(f"mean {result['mean_turns']:.3f}  p95 {result['p95_turns']:.0f}  max {result['max_turns']}  "
+          f"failure rate (> 6 turns) {result['failure_rate']:.2%}  unfinished {result['unfinished']}")
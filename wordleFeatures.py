@@ -0,0 +1,68 @@
+# Vectorized feature scoring for the wordle solver
+# Computes the same features as the original pandas path (update_letter_scores + the score_word_* applies)
+# as array reductions over the encoded word matrix from wordleFilter, in a single pass over the remaining words
+
+import numpy
+
+FEATURES = ['letter_score_by_word', 'letter_score_by_freq', 'letter_score_pos_perc', 'letter_score_pos_freq', 'distinct_letters']
+
+# (n_words, n_codes) bool matrix of which letters appear anywhere in each word
+def letter_presence(encoded: numpy.ndarray, n_codes: int) -> numpy.ndarray:
+    presence = numpy.zeros((len(encoded), n_codes), dtype=bool)
+    presence[numpy.arange(len(encoded))[:, None], encoded] = True
+    return presence
+
+# Per letter counts matching update_letter_scores. Letters already known to be in the word only count
+# the first word they appear in (the original only increments letters not in letters_in)
+def letter_counts(presence: numpy.ndarray, freq: numpy.ndarray, in_codes: list) -> tuple:
+    counts = presence.sum(axis=0).astype(numpy.float64)
+    weighted = freq @ presence
+    for code in in_codes:
+        if counts[code]:
+            counts[code] = 1
+            weighted[code] = freq[numpy.argmax(presence[:, code])]
+    return counts, weighted
+
+# Per position counts matching update_letter_scores. Letters already known in or out are skipped
+def position_counts(encoded: numpy.ndarray, freq: numpy.ndarray, n_codes: int, known_codes: list) -> tuple:
+    counts = numpy.zeros((encoded.shape[1], n_codes))
+    weighted = numpy.zeros((encoded.shape[1], n_codes))
+    for pos in range(encoded.shape[1]):
+        counts[pos] = numpy.bincount(encoded[:, pos], minlength=n_codes)
+        weighted[pos] = numpy.bincount(encoded[:, pos], weights=freq, minlength=n_codes)
+    counts[:, known_codes] = 0
+    weighted[:, known_codes] = 0
+    totals = counts.sum(axis=1, keepdims=True)
+    perc = numpy.divide(counts, totals, out=numpy.zeros_like(counts), where=totals > 0)
+    return perc, weighted
+
+# Scores every word in one pass. Returns the raw (unnormalized) feature columns plus the per letter
+# tables so callers can keep the letter_scores_* dicts the solver exposes
+def score_features(encoded: numpy.ndarray, freq: numpy.ndarray, n_codes: int, in_codes: list, out_codes: list) -> dict:
+    freq = numpy.asarray(freq, dtype=numpy.float64)
+    presence = letter_presence(encoded, n_codes)
+    counts, weighted = letter_counts(presence, freq, in_codes)
+    present = presence.any(axis=0)
+    by_word = counts / counts[present].sum()
+
+    pos_perc, pos_freq = position_counts(encoded, freq, n_codes, list(set(in_codes) | set(out_codes)))
+    positions = numpy.arange(encoded.shape[1])
+
+    return {
+        'letter_score_by_word': presence @ by_word,
+        'letter_score_by_freq': presence @ weighted,
+        'letter_score_pos_perc': pos_perc[positions, encoded].sum(axis=1),
+        'letter_score_pos_freq': pos_freq[positions, encoded].sum(axis=1),
+        'distinct_letters': presence.sum(axis=1),
+        'letter_tables': {'present': present, 'by_word': by_word, 'by_freq': weighted,
+                          'pos_present': pos_perc > 0, 'pos_perc': pos_perc, 'pos_freq': pos_freq},
+    }
+
+# Scales features to the same 0-1ish range across the remaining words. Works on numpy arrays or pandas columns
+def normalize_features(features, n_letters: int) -> dict:
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        normalized = {col: features[col] / features[col].max() for col in ['freq', 'letter_score_by_word', 'letter_score_by_freq',
+                                                                          'letter_score_pos_perc', 'letter_score_pos_freq']}
+    # Normalize distinct letters by punishing non-max more
+    normalized['distinct_letters'] = 1 - (2.0 * (features['distinct_letters'].max() - features['distinct_letters']) / n_letters)
+    return normalized
@@ -0,0 +1,139 @@
+# Precomputed guess x answer feedback table
+# Encodes the response for every (guess, answer) pair in a corpus as a base 3 pattern code
+# ('_' = 0, '-' = 1, '+' = 2, position i worth 3**i) so playing or filtering is a table lookup.
+# The table is built once per n_letters + corpus, saved next to the start_words pickles and opened with
+# numpy memmap so every simulator process shares one copy of the pages
+
+import hashlib
+import os
+from typing import List
+import numpy
+from wordleFilter import build_alphabet, encode_words, wordleFilter
+from wordleFeatures import letter_presence
+
+RESPONSE_CHARS = '_-+'
+# Bumped whenever the response rules change so tables built under the old rules aren't reused
+FEEDBACK_VERSION = 2
+
+# Smallest unsigned dtype that holds every pattern code for this word length
+def pattern_dtype(n_letters: int):
+    if 3 ** n_letters <= 2 ** 8:
+        return numpy.uint8
+    if 3 ** n_letters <= 2 ** 16:
+        return numpy.uint16
+    return numpy.uint32
+
+def encode_response(response) -> int:
+    return sum(RESPONSE_CHARS.index(r) * 3 ** i for i, r in enumerate(response))
+
+def decode_response(code: int, n_letters: int) -> str:
+    code = int(code)
+    response = ''
+    for _ in range(n_letters):
+        response += RESPONSE_CHARS[code % 3]
+        code //= 3
+    return response
+
+# Stable identifier for a word list, so tables built for a different corpus are never reused
+def corpus_hash(words) -> str:
+    return hashlib.sha1('\n'.join(words).encode('utf-8')).hexdigest()
+
+# Base 3 pattern codes for broadcastable encoded guesses and answers of shape (..., n_letters)
+# Proper wordle duplicate letter accounting: greens are matched first, then each remaining guess letter
+# is '-' only while the answer still has unmatched copies of it, left to right. e.g. guess `speed`
+# against answer `abide` is `__-_-`: only the first `e` gets a `-` since `abide` has one `e`
+def pattern_codes(guesses: numpy.ndarray, answers: numpy.ndarray) -> numpy.ndarray:
+    n_letters = guesses.shape[-1]
+    green = guesses == answers
+    shape = numpy.broadcast_shapes(guesses.shape, answers.shape)[:-1]
+    codes = numpy.zeros(shape, dtype=pattern_dtype(n_letters))
+    for i in range(n_letters):
+        letter = guesses[..., i]
+        # unmatched copies of this letter in the answer, and copies already used by earlier guess letters
+        available = sum((answers[..., j] == letter) & ~green[..., j] for j in range(n_letters))
+        used = sum((guesses[..., k] == letter) & ~green[..., k] for k in range(i))
+        digit = numpy.where(green[..., i], 2, available > used).astype(codes.dtype)
+        codes += digit * codes.dtype.type(3 ** i)
+    return codes
+
+# Pattern codes for every guess against every answer, shape (len(guesses), len(answers))
+# Guesses without repeated letters can't run out of answer copies, so for them a letter is simply `-`
+# if it's anywhere in the answer. Only guesses with repeats need the full accounting in pattern_codes
+def feedback_codes(guesses: numpy.ndarray, answers: numpy.ndarray) -> numpy.ndarray:
+    n_letters = guesses.shape[1]
+    codes = numpy.empty((len(guesses), len(answers)), dtype=pattern_dtype(n_letters))
+    repeats = (guesses[:, :, None] == guesses[:, None, :]).sum(axis=(1, 2)) > n_letters
+    codes[repeats] = pattern_codes(guesses[repeats][:, None, :], answers[None, :, :])
+
+    distinct = guesses[~repeats]
+    present = letter_presence(answers, int(max(guesses.max(initial=0), answers.max(initial=0))) + 1)
+    distinct_codes = numpy.zeros((len(distinct), len(answers)), dtype=codes.dtype)
+    for i in range(n_letters):
+        green = distinct[:, i, None] == answers[None, :, i]
+        digit = numpy.where(green, 2, present[:, distinct[:, i]].T).astype(codes.dtype)
+        distinct_codes += digit * codes.dtype.type(3 ** i)
+    codes[~repeats] = distinct_codes
+    return codes
+
+# Pattern codes for equal length lists of guess and answer words, scored pairwise
+def pair_codes(guesses: List[str], answers: List[str]) -> numpy.ndarray:
+    n_letters = len(guesses[0]) if len(guesses) else 0
+    alphabet = build_alphabet(list(guesses) + list(answers))
+    return pattern_codes(encode_words(guesses, alphabet, n_letters), encode_words(answers, alphabet, n_letters))
+
+# Response strings for an array of pattern codes
+def decode_responses(codes: numpy.ndarray, n_letters: int) -> List[str]:
+    if numpy.size(codes) == 0:
+        return []
+    digits = (numpy.asarray(codes, dtype=numpy.int64)[..., None] // 3 ** numpy.arange(n_letters)) % 3
+    return [''.join(chars) for chars in numpy.array(list(RESPONSE_CHARS))[digits].reshape(-1, n_letters)]
+
+
+class feedbackTable:
+    def __init__(self, words, n_letters: int, codes: numpy.ndarray):
+        self.n_letters = n_letters
+        self.words = list(words)
+        self.word_ids = {w: i for i, w in enumerate(self.words)}
+        self.corpus_hash = corpus_hash(self.words)
+        self.codes = codes
+
+    # Response string for a guess against an answer, or None if either word isn't in the table
+    def response(self, guess: str, answer: str) -> str:
+        if guess not in self.word_ids or answer not in self.word_ids:
+            return None
+        return decode_response(self.codes[self.word_ids[guess], self.word_ids[answer]], self.n_letters)
+
+    # Which answers (optionally only `rows`) would have given this response to this guess
+    # A single equality test on one row of the table
+    def matches(self, guess: str, response: List[str], rows=None) -> numpy.ndarray:
+        row = self.codes[self.word_ids[guess]]
+        if rows is not None:
+            row = row[rows]
+        return row == encode_response(response)
+
+
+def feedback_table_path(n_letters: int, words) -> str:
+    return f"./start_words/feedback_{n_letters}_letters_{corpus_hash(list(words))[:12]}_v{FEEDBACK_VERSION}.npy"
+
+# Build the table for a corpus and write it to path. Written in chunks of guesses straight into
+# an on-disk .npy and renamed into place at the end so concurrent readers never see a partial file
+def build_feedback_table(words, n_letters: int, path: str, chunk_size: int = 256):
+    word_filter = wordleFilter(words, n_letters)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    codes = numpy.lib.format.open_memmap(tmp_path, mode='w+', dtype=pattern_dtype(n_letters),
+                                         shape=(len(words), len(words)))
+    for start in range(0, len(words), chunk_size):
+        codes[start:start + chunk_size] = feedback_codes(word_filter.encoded[start:start + chunk_size], word_filter.encoded)
+    codes.flush()
+    del codes
+    os.replace(tmp_path, path)
+
+# Open (building first if needed) the feedback table for a corpus as a read-only memmap
+def load_feedback_table(words, n_letters: int, build: bool = True) -> feedbackTable:
+    words = list(words)
+    path = feedback_table_path(n_letters, words)
+    if not os.path.exists(path):
+        if not build:
+            raise FileNotFoundError(path)
+        build_feedback_table(words, n_letters, path)
+    return feedbackTable(words, n_letters, numpy.load(path, mmap_mode='r'))
@@ -0,0 +1,129 @@
+# Vectorized candidate filtering for the wordle solver
+# Stores the corpus as a fixed width uint8 letter matrix (one row per word, one column per position)
+# plus a per-word letter presence bitmask, so each constraint in letters_in, letters_out, pos_yes and pos_no
+# becomes one boolean mask operation over the whole array instead of a python call per word
+
+from typing import List
+import numpy
+
+# Builds the letter -> code mapping for a corpus. Sorted so a-z get the low codes / bits
+# The corpus includes accented and non-latin letters so this can't just be ord(l) - ord('a')
+def build_alphabet(words) -> dict:
+    return {l: code for code, l in enumerate(sorted(set(''.join(words))))}
+
+# Encodes words as a (n_words, n_letters) uint8 matrix of letter codes
+def encode_words(words, alphabet: dict, n_letters: int) -> numpy.ndarray:
+    if len(alphabet) > 256:
+        raise ValueError(f"Alphabet of {len(alphabet)} letters does not fit in uint8 codes")
+    encoded = numpy.empty((len(words), n_letters), dtype=numpy.uint8)
+    for i, w in enumerate(words):
+        encoded[i] = [alphabet[l] for l in w]
+    return encoded
+
+# Number of uint64 words needed to hold one bit per letter code
+def mask_width(n_codes: int) -> int:
+    return max(1, (n_codes + 63) // 64)
+
+# Per-word letter presence bitmasks, shape (n_words, mask_width). Bit `code % 64` of column `code // 64`
+# is set if the word contains that letter anywhere. Almost always a single column
+def letter_masks(encoded: numpy.ndarray, n_codes: int) -> numpy.ndarray:
+    masks = numpy.zeros((len(encoded), mask_width(n_codes)), dtype=numpy.uint64)
+    for col in range(masks.shape[1]):
+        for pos in range(encoded.shape[1]):
+            codes = encoded[:, pos].astype(numpy.int64) - 64 * col
+            in_col = (codes >= 0) & (codes < 64)
+            masks[in_col, col] |= numpy.left_shift(numpy.uint64(1), codes[in_col].astype(numpy.uint64))
+    return masks
+
+
+class wordleFilter:
+    def __init__(self, words, n_letters: int):
+        self.n_letters = n_letters
+        self.words = numpy.asarray(words)
+        self.alphabet = build_alphabet(words)
+        self.encoded = encode_words(words, self.alphabet, n_letters)
+        self.masks = letter_masks(self.encoded, len(self.alphabet))
+        # Inverted indexes, built on first use: bitsets of the word ids containing each letter anywhere,
+        # and with each letter at each position
+        self.letter_index = None
+        self.position_index = None
+
+    def build_indexes(self):
+        n_codes = len(self.alphabet)
+        presence = numpy.zeros((len(self.encoded), n_codes), dtype=bool)
+        presence[numpy.arange(len(self.encoded))[:, None], self.encoded] = True
+        # letter_index is set last as it marks the indexes built (threads may share a filter, e.g. in wordleServer)
+        self.position_index = numpy.stack([numpy.packbits(self.encoded[:, pos] == numpy.arange(n_codes)[:, None], axis=1)
+                                           for pos in range(self.n_letters)])
+        self.letter_index = numpy.packbits(presence.T, axis=1)
+
+    # Bitmask for a set of letters. Letters outside the corpus alphabet can't be in any word,
+    # so they're returned separately for the caller to decide what that means
+    def letters_mask(self, letters) -> tuple:
+        mask = numpy.zeros(self.masks.shape[1], dtype=numpy.uint64)
+        unknown = set()
+        for l in letters:
+            if l in self.alphabet:
+                code = self.alphabet[l]
+                mask[code // 64] |= numpy.uint64(1) << numpy.uint64(code % 64)
+            else:
+                unknown.add(l)
+        return mask, unknown
+
+    # Codes for the letters in a position set, skipping letters no word can have
+    def letter_codes(self, letters) -> List[int]:
+        return [self.alphabet[l] for l in letters if l in self.alphabet]
+
+    # Boolean array of which words satisfy every constraint. Same semantics as wordleSolver.word_in
+    # rows restricts the check to those row ids (e.g. the index of the remaining possible_words)
+    def matches(self, letters_in: set, letters_out: set, pos_yes: List[set], pos_no: List[set], rows=None) -> numpy.ndarray:
+        encoded = self.encoded if rows is None else self.encoded[rows]
+        masks = self.masks if rows is None else self.masks[rows]
+        keep = numpy.ones(len(encoded), dtype=bool)
+
+        if letters_out:
+            out_mask, _ = self.letters_mask(letters_out)
+            keep &= ((masks & out_mask) == 0).all(axis=1)
+
+        if letters_in:
+            in_mask, unknown = self.letters_mask(letters_in)
+            if unknown:
+                return numpy.zeros(len(encoded), dtype=bool)
+            keep &= ((masks & in_mask) == in_mask).all(axis=1)
+
+        for i in range(self.n_letters):
+            if pos_no[i]:
+                keep &= ~numpy.isin(encoded[:, i], self.letter_codes(pos_no[i]))
+            if pos_yes[i]:
+                keep &= numpy.isin(encoded[:, i], self.letter_codes(pos_yes[i]))
+        return keep
+
+    # Narrow `rows` (which already satisfy every earlier constraint) by only the constraints added since.
+    # Each one is a lookup of the survivors in one inverted index bitset, so late turns with few survivors are nearly free
+    # pos_yes is {position: letters} for positions that had no green letter before (once a position has one,
+    # more letters there can only loosen word_in's check, so they can't remove anything)
+    def narrow(self, rows: numpy.ndarray, letters_in: set, letters_out: set, pos_yes: dict, pos_no: list) -> numpy.ndarray:
+        if self.letter_index is None:
+            self.build_indexes()
+        keep = numpy.ones(len(rows), dtype=bool)
+        byte, bit = rows >> 3, (7 - (rows & 7)).astype(numpy.uint8)
+
+        def contains(bitset):
+            return ((bitset[byte] >> bit) & 1).astype(bool)
+
+        for l in letters_out:
+            if l in self.alphabet:
+                keep &= ~contains(self.letter_index[self.alphabet[l]])
+        for l in letters_in:
+            if l not in self.alphabet:
+                return numpy.zeros(len(rows), dtype=bool)
+            keep &= contains(self.letter_index[self.alphabet[l]])
+        for i, l in pos_no:
+            if l in self.alphabet:
+                keep &= ~contains(self.position_index[i][self.alphabet[l]])
+        for i, letters in pos_yes.items():
+            at_pos = numpy.zeros(len(rows), dtype=bool)
+            for code in self.letter_codes(letters):
+                at_pos |= contains(self.position_index[i][code])
+            keep &= at_pos
+        return keep
@@ -2,51 +2,59 @@
 # Created the wordleGame class to utilize in simulations
 # Able to play games of any word length
 
-from tkinter import N
-from wordfreq import get_frequency_dict
+from typing import List
 import random
+from wordleCorpus import valid_words
+from wordleFeedback import decode_responses, pair_codes
 
 class wordleGame:
-    def __init__(self, n_letters: int, random_word: bool = True, starter_word: str = ''):
+    def __init__(self, n_letters: int, random_word: bool = True, starter_word: str = '', feedback_table = None):
         self.n_letters = n_letters
         self.random_word = random_word
+        # Optional wordleFeedback.feedbackTable to look responses up instead of computing them
+        self.feedback_table = feedback_table
         self.valid_words = self.create_valid_words(n_letters)
         self.word = self.seed_word(starter_word)
         self.turn = 0
     
-    # Create valid word list for guesses
+    # Create valid word list for guesses. Shared by every game in the process (see wordleCorpus) so don't modify it
     def create_valid_words(self, n_letters):
-        freq_dict = get_frequency_dict('en', wordlist='best')
-        n_letter_words = []
-        for w in freq_dict.items():
-            if len(w[0]) == self.n_letters and w[0].isalpha(): #removes non-alpha words like don't
-                n_letter_words.append(w[0])
-        return n_letter_words
+        return valid_words(n_letters).words
 
-    # Pick starter word
-    def seed_word(self, starter_word: str):
+    # Pick starter word. rng lets simulations pick words reproducibly
+    def seed_word(self, starter_word: str, rng = random):
         if self.random_word:
-            return self.valid_words[random.randint(0, 10000)] # pick one of the 10,000 most common words for this length
+            # pick one of the 10,000 most common words for this length (all of them for lengths with fewer words)
+            return self.valid_words[rng.randint(0, min(10000, len(self.valid_words) - 1))]
         else:
             return starter_word
 
+    # Start a new game without rebuilding the valid word list
+    def reset(self, starter_word: str = '', rng = random):
+        self.word = self.seed_word(starter_word, rng)
+        self.turn = 0
+
     def respond_guess(self, guess: str) -> dict:
         self.turn += 1
         win = False
-        response = ''
-        for i, l in enumerate(guess):
-            if l == self.word[i]:
-                response += ('+')
-            elif l in self.word:
-                response += ('-')
-            else:
-                response += ('_')
+        response = self.feedback_table.response(guess, self.word) if self.feedback_table else None
+        if response is None:
+            response = score_guesses([guess], [self.word], as_strings=True)[0]
 
         if sum([1 for r in response if r == '+']) == len(response):
             win = True
         
         return {"win": win, "turn": self.turn, "response": response}
 
+# Scores many (guess, answer) pairs at once, with wordle's duplicate letter rules
+# (a repeated guess letter only gets a `-` for each unmatched copy in the answer)
+# Returns base 3 pattern codes (see wordleFeedback) or, with as_strings, responses like `+-__-`
+def score_guesses(guesses: List[str], answers: List[str], as_strings: bool = False):
+    codes = pair_codes(guesses, answers)
+    if as_strings:
+        return decode_responses(codes, len(guesses[0]) if len(guesses) else 0)
+    return codes
+
 # For when you are running a game via the command line
 if __name__ == '__main__':
     # Pick a length of game
@@ -0,0 +1,120 @@
+# Local load test for wordleServer
+# Plays games through the server with increasing numbers of concurrent sessions (each on its own keep-alive
+# connection, answering with wordleGame's scoring) and reports throughput and latency percentiles per session count.
+# Starts its own server unless --port points at a running one:
+#   python wordleLoadTest.py --sessions 1 4 16 64 --games 5
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+import numpy
+from wordleEval import answer_words
+from wordleGame import score_guesses
+
+# One request on an open keep-alive connection. Returns the status code and JSON body
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str, body: dict = None) -> tuple:
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1') + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+# Play games one after another on one connection, recording (endpoint, seconds) for every request
+async def play_session(host: str, port: int, n_letters: int, targets: list, latencies: list, max_turns: int = 20):
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def timed(endpoint: str, method: str, path: str, body: dict = None) -> dict:
+        start = time.perf_counter()
+        status, result = await request(reader, writer, method, path, body)
+        latencies.append((endpoint, time.perf_counter() - start))
+        if status != 200:
+            raise RuntimeError(f"{endpoint} failed with {status}: {result}")
+        return result
+
+    try:
+        for target in targets:
+            session_id = (await timed('create', 'POST', '/sessions', {'n_letters': n_letters}))['session_id']
+            for _ in range(max_turns):
+                guess = (await timed('next_guess', 'POST', f"/sessions/{session_id}/next_guess", {}))['guess']
+                response = score_guesses([guess], [target], as_strings=True)[0]
+                result = await timed('process_guess', 'POST', f"/sessions/{session_id}/process_guess",
+                                     {'guess': guess, 'response': response})
+                if result['win'] or result['remaining'] == 0:
+                    break
+            await timed('delete', 'DELETE', f"/sessions/{session_id}")
+    finally:
+        writer.close()
+
+async def run_load(host: str, port: int, sessions: int, games: int, n_letters: int, seed: int = 0) -> dict:
+    answers = answer_words(n_letters)
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[play_session(host, port, n_letters, [rng.choice(answers) for _ in range(games)], latencies)
+                           for _ in range(sessions)])
+    seconds = time.perf_counter() - start
+    times = numpy.array([t for _, t in latencies]) * 1000
+    return {'sessions': sessions, 'requests': len(times), 'seconds': seconds, 'requests_per_s': len(times) / seconds,
+            'p50_ms': numpy.percentile(times, 50), 'p95_ms': numpy.percentile(times, 95),
+            'p99_ms': numpy.percentile(times, 99), 'max_ms': times.max()}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# Start a server in a subprocess and wait until it answers /health
+def start_server(port: int, n_letters: int, workers: int) -> subprocess.Popen:
+    server = subprocess.Popen([sys.executable, 'wordleServer.py', '--port', str(port), '--preload', str(n_letters),
+                               '--workers', str(workers)], stdout=subprocess.DEVNULL)
+    for _ in range(600):
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1) as s:
+                s.sendall(b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+                if s.recv(64).startswith(b"HTTP/1.1 200"):
+                    return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server didn't start")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test wordleServer')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='port of a running server (default starts one)')
+    parser.add_argument('--sessions', type=int, nargs='*', default=[1, 4, 16, 64])
+    parser.add_argument('--games', type=int, default=5, help='games played by each session')
+    parser.add_argument('--n-letters', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4, help='solver threads for a started server')
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        server = start_server(port, args.n_letters, args.workers)
+    try:
+        print(f"{'sessions':>8} {'requests':>8} {'seconds':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for sessions in args.sessions:
+            r = asyncio.run(run_load(args.host, port, sessions, args.games, args.n_letters))
+            print(f"{r['sessions']:>8} {r['requests']:>8} {r['seconds']:>8.2f} {r['requests_per_s']:>8.1f} {r['p50_ms']:>8.2f} "
+                  f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,185 @@
+# Log sinks for the simulator's game and turn logs
+# Rows are buffered and written in batches of batch_size (and whatever is left on close), so a big sweep does a
+# few thousand writes instead of one per turn and a crash loses at most one batch. The format comes from the path:
+# * .csv      the original csv logs, appended to with a header for new files. Lists and dicts are repr strings
+# * .parquet  a directory of parquet files, one per run with a row group per batch (needs pyarrow)
+# * .arrow    a directory of arrow IPC files, one per run with a record batch per batch (needs pyarrow)
+# * .npz      a directory of compressed npz files, one per batch (numpy only)
+# The columnar formats keep real types: lists of letters are list columns, pos_yes / pos_no are lists of lists
+# and model_params is a struct, so read_log gives back python lists and dicts rather than strings to parse.
+# Columnar logs are directories so later runs can add to the same log the way the csv logs are appended to
+
+import csv
+import os
+import numpy
+import pandas
+
+# Column kinds: str, int, float, datetime, list (of str), nested (list of lists of str) and params (dict of str: float)
+
+class logSink:
+    def __init__(self, path: str, columns: list, types: dict, batch_size: int = 1000):
+        self.path = path
+        self.columns = columns
+        self.types = types
+        self.batch_size = batch_size
+        self.rows = []
+
+    def write(self, rows: list):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.write_batch(self.rows)
+            self.rows = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class csvSink(logSink):
+    def __init__(self, path: str, columns: list, types: dict, batch_size: int = 1000, header: list = None):
+        super().__init__(path, columns, types, batch_size)
+        new_file = not os.path.exists(path)
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.writer(self.file)
+        if new_file:
+            self.writer.writerow(header or columns)
+
+    def write_batch(self, rows: list):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+
+def log_parts(path: str, extension: str) -> list:
+    return sorted(os.path.join(path, f) for f in os.listdir(path) if f.startswith('part-') and f.endswith(extension))
+
+# Next unused part file name in a columnar log directory
+def part_path(path: str, extension: str) -> str:
+    os.makedirs(path, exist_ok=True)
+    part = len(log_parts(path, extension))
+    while os.path.exists(os.path.join(path, f"part-{part:05d}{extension}")):
+        part += 1
+    return os.path.join(path, f"part-{part:05d}{extension}")
+
+def arrow_type(kind: str, example=None):
+    import pyarrow
+    if kind == 'params':
+        return pyarrow.struct([(key, pyarrow.float64()) for key in example])
+    return {'str': pyarrow.string(), 'int': pyarrow.int64(), 'float': pyarrow.float64(), 'datetime': pyarrow.timestamp('us'),
+            'list': pyarrow.list_(pyarrow.string()), 'nested': pyarrow.list_(pyarrow.list_(pyarrow.string()))}[kind]
+
+# Parquet and arrow IPC logs share everything but the writer. The schema is fixed from the first batch
+# (model_params keys are the same for every game of a run)
+class arrowSink(logSink):
+    def __init__(self, path: str, columns: list, types: dict, batch_size: int = 1000, ipc: bool = False):
+        import pyarrow  # fail when the log is opened rather than at the first flush
+        super().__init__(path, columns, types, batch_size)
+        self.ipc = ipc
+        self.writer = None
+
+    def write_batch(self, rows: list):
+        import pyarrow
+        if self.writer is None:
+            self.schema = pyarrow.schema([(col, arrow_type(self.types[col], rows[0][i])) for i, col in enumerate(self.columns)])
+            if self.ipc:
+                self.writer = pyarrow.ipc.new_file(part_path(self.path, '.arrow'), self.schema)
+            else:
+                import pyarrow.parquet
+                self.writer = pyarrow.parquet.ParquetWriter(part_path(self.path, '.parquet'), self.schema)
+        batch = pyarrow.record_batch([pyarrow.array([row[i] for row in rows], type=self.schema.field(col).type)
+                                      for i, col in enumerate(self.columns)], schema=self.schema)
+        if self.ipc:
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write_table(pyarrow.Table.from_batches([batch]))
+
+    def close(self):
+        super().close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Flattens the list kinds into values plus offsets (arrow style: row i is values[offsets[i]:offsets[i + 1]])
+# and params into one float array per key, so everything is a plain numpy array
+def npz_columns(col: str, kind: str, values: list) -> dict:
+    if kind == 'list':
+        return {col: numpy.array([v for row in values for v in row], dtype=str),
+                f"{col}.offsets": numpy.cumsum([0] + [len(row) for row in values])}
+    if kind == 'nested':
+        inner = [pos for row in values for pos in row]
+        return {col: numpy.array([v for pos in inner for v in pos], dtype=str),
+                f"{col}.offsets": numpy.cumsum([0] + [len(pos) for pos in inner]),
+                f"{col}.outer_offsets": numpy.cumsum([0] + [len(row) for row in values])}
+    if kind == 'params':
+        return {f"{col}.{key}": numpy.array([row[key] for row in values], dtype=numpy.float64) for key in values[0]}
+    dtype = {'str': str, 'int': numpy.int64, 'float': numpy.float64, 'datetime': 'datetime64[us]'}[kind]
+    return {col: numpy.array(values, dtype=dtype)}
+
+def split_offsets(values, offsets) -> list:
+    return [values[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+def npz_values(data, col: str, kind: str) -> list:
+    if kind == 'list':
+        return [list(row) for row in split_offsets(data[col].tolist(), data[f"{col}.offsets"])]
+    if kind == 'nested':
+        inner = [list(pos) for pos in split_offsets(data[col].tolist(), data[f"{col}.offsets"])]
+        return split_offsets(inner, data[f"{col}.outer_offsets"])
+    if kind == 'params':
+        keys = [name[len(col) + 1:] for name in data.files if name.startswith(f"{col}.")]
+        return [dict(zip(keys, row)) for row in zip(*[data[f"{col}.{key}"].tolist() for key in keys])]
+    return data[col]
+
+class npzSink(logSink):
+    def write_batch(self, rows: list):
+        arrays = {'__columns__': numpy.array(self.columns),
+                  '__types__': numpy.array([self.types[col] for col in self.columns])}
+        for i, col in enumerate(self.columns):
+            arrays.update(npz_columns(col, self.types[col], [row[i] for row in rows]))
+        path = part_path(self.path, '.npz')
+        tmp_path = os.path.join(self.path, f".tmp-{os.getpid()}.npz")
+        numpy.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+
+# Sink for a log path, picked by its extension
+def open_sink(path: str, columns: list, types: dict, batch_size: int = 1000, header: list = None) -> logSink:
+    extension = os.path.splitext(path)[1]
+    if extension == '.parquet':
+        return arrowSink(path, columns, types, batch_size)
+    if extension == '.arrow':
+        return arrowSink(path, columns, types, batch_size, ipc=True)
+    if extension == '.npz':
+        return npzSink(path, columns, types, batch_size)
+    return csvSink(path, columns, types, batch_size, header=header)
+
+# Read a log written by any of the sinks back into a DataFrame
+def read_log(path: str) -> pandas.DataFrame:
+    extension = os.path.splitext(path)[1]
+    if extension not in ['.parquet', '.arrow', '.npz']:
+        return pandas.read_csv(path)
+    frames = []
+    for part in log_parts(path, extension):
+        if extension == '.parquet':
+            import pyarrow.parquet
+            frames.append(pyarrow.parquet.read_table(part).to_pandas())
+        elif extension == '.arrow':
+            import pyarrow
+            with pyarrow.memory_map(part) as source:
+                frames.append(pyarrow.ipc.open_file(source).read_all().to_pandas())
+        else:
+            with numpy.load(part) as data:
+                types = dict(zip(data['__columns__'].tolist(), data['__types__'].tolist()))
+                frames.append(pandas.DataFrame({col: npz_values(data, col, kind) for col, kind in types.items()}))
+    return pandas.concat(frames, ignore_index=True) if frames else pandas.DataFrame()
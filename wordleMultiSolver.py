@@ -0,0 +1,130 @@
+# Multi-board (Quordle / Octordle style) solver
+# n_boards hidden words share every guess. Each board is a wordleSolver holding only its own constraints and
+# remaining rows of the one shared encoded corpus, so a board costs the same few KB as a single game.
+# After a guess one feedback computation (the guess against every board's remaining words at once) filters
+# all the boards. Guesses are scored against all boards together:
+# * sort_on='model_rank' adds up each board's model_rank for the words still possible there
+# * sort_on='entropy' / 'expected_remaining' scores candidate guesses against every board's remaining words in one
+#   batched feedback_codes call and adds up the boards' information (boards are independent, so entropies add)
+# A board down to one word is always played first since that guess solves it for certain
+
+from typing import List
+import numpy
+import pandas
+from wordleEntropy import information_scores, top_indices
+from wordleFeedback import encode_response, feedback_codes
+from wordleFilter import encode_words
+from wordleSolver import DEFAULT_MODEL_PARAMS, top_n_positions, wordleSolver
+
+class wordleMultiSolver:
+    def __init__(self, n_letters: int, n_boards: int = 4, feedback_table = None):
+        self.n_letters = n_letters
+        self.n_boards = n_boards
+        self.boards = [wordleSolver(n_letters, feedback_table=feedback_table) for _ in range(n_boards)]
+        self.word_filter = self.boards[0].word_filter
+        self.feedback_table = feedback_table
+        self.reset()
+
+    def reset(self):
+        for board in self.boards:
+            board.reset()
+        self.solved = [False] * self.n_boards
+        self.guesses = []
+
+    def unsolved(self) -> List[int]:
+        return [b for b in range(self.n_boards) if not self.solved[b]]
+
+    # Remaining words per board (empty for solved boards)
+    def remaining_words(self) -> List[numpy.ndarray]:
+        return [board.remaining_words() if not self.solved[b] else numpy.array([], dtype=str) for b, board in enumerate(self.boards)]
+
+    # responses has one response per board. Solved boards' responses are ignored (use None or anything)
+    # One feedback computation of the guess against every unsolved board's remaining rows filters them all
+    def process_guess(self, guess: str, responses: list):
+        self.guesses.append({'guess': guess, 'responses': responses})
+        boards = self.unsolved()
+        if not boards:
+            return
+        rows = [self.boards[b].rows for b in boards]
+        codes = self.guess_codes(guess, numpy.concatenate(rows))
+        start = 0
+        for b, board_rows in zip(boards, rows):
+            response = responses[b]
+            board_codes = codes[start:start + len(board_rows)]
+            start += len(board_rows)
+            if ''.join(response) == '+' * self.n_letters:
+                self.solved[b] = True
+                continue
+            self.boards[b].process_matches(guess, response, board_codes == encode_response(response))
+
+    # Pattern codes of one guess against corpus rows, from the feedback table when the guess is in it
+    def guess_codes(self, guess: str, rows: numpy.ndarray) -> numpy.ndarray:
+        if self.feedback_table and guess in self.feedback_table.word_ids:
+            return numpy.asarray(self.feedback_table.codes[self.feedback_table.word_ids[guess]][rows])
+        unknown = set(guess) - set(self.word_filter.alphabet)
+        if unknown:
+            raise ValueError(f"{guess} has letters that aren't in the corpus: {''.join(sorted(unknown))}")
+        return feedback_codes(encode_words([guess], self.word_filter.alphabet, self.n_letters), self.word_filter.encoded[rows])[0]
+
+    # None once no word fits any unsolved board (e.g. an answer outside the corpus)
+    def next_guess(self, sort_on: str = 'model_rank', model_params: dict = DEFAULT_MODEL_PARAMS,
+                   max_guesses: int = 500, max_answers: int = 2000) -> str:
+        boards = self.unsolved()
+        for b in boards:
+            if len(self.boards[b].rows) == 1:
+                return self.boards[b].remaining_words()[0]
+        if sort_on == 'model_rank':
+            return self.rank_by_model(boards, model_params)
+        ranked = self.rank_by_information(boards, sort_on, model_params, max_guesses, max_answers)
+        return ranked.iloc[0]['word'] if len(ranked) else None
+
+    # The words possible on at least one board, the sum of each board's model_rank for them (0 on boards where
+    # they aren't possible) and how many boards they're possible on
+    def model_ranks(self, boards: List[int], model_params: dict) -> tuple:
+        total = numpy.zeros(len(self.word_filter.words))
+        possible = numpy.zeros(len(total), dtype=int)
+        for b in boards:
+            board = self.boards[b]
+            total[board.rows] += board.rank_words(model_params)
+            possible[board.rows] += 1
+        candidates = numpy.flatnonzero(possible)
+        return candidates, total[candidates], possible[candidates]
+
+    # Best combined model_rank, ties going the same way as sorting a Series of the sums. None if no word fits any board
+    def rank_by_model(self, boards: List[int], model_params: dict) -> str:
+        candidates, ranks, _ = self.model_ranks(boards, model_params)
+        if not len(candidates):
+            return None
+        return self.word_filter.words[candidates[top_n_positions(ranks, 1)[0]]]
+
+    # Candidate guesses are the best of the combined model_rank. Every one is scored against every board's remaining
+    # words (sampled down to max_answers a board) in a single feedback_codes call, then each board's slice of the
+    # columns is bucketed separately and the per board entropies / expected remaining words are added up
+    def rank_by_information(self, boards: List[int], sort_on: str = 'entropy', model_params: dict = DEFAULT_MODEL_PARAMS,
+                            max_guesses: int = 500, max_answers: int = 2000) -> pandas.DataFrame:
+        candidates, ranks, possible = self.model_ranks(boards, model_params)
+        best = top_indices(ranks, max_guesses)
+        guess_rows = candidates[best]
+        answer_rows = []
+        for b in boards:
+            rows = self.boards[b].rows
+            if len(rows) > max_answers:
+                rows = numpy.sort(numpy.random.default_rng(b).choice(rows, max_answers, replace=False))
+            answer_rows.append(rows)
+        if self.feedback_table:
+            codes = self.feedback_table.codes[guess_rows][:, numpy.concatenate(answer_rows)]
+        else:
+            codes = feedback_codes(self.word_filter.encoded[guess_rows], self.word_filter.encoded[numpy.concatenate(answer_rows)])
+        entropy = numpy.zeros(len(guess_rows))
+        expected_remaining = numpy.zeros(len(guess_rows))
+        start = 0
+        for rows in answer_rows:
+            board_entropy, board_remaining = information_scores(codes[:, start:start + len(rows)])
+            entropy += board_entropy
+            expected_remaining += board_remaining
+            start += len(rows)
+        ranked = pandas.DataFrame({'word': self.word_filter.words[guess_rows], 'entropy': entropy,
+                                   'expected_remaining': expected_remaining,
+                                   'boards_possible': possible[best], 'model_rank': ranks[best]}, index=guess_rows)
+        return ranked.sort_values([sort_on, 'boards_possible', 'model_rank'], ascending=[sort_on != 'entropy', False, False],
+                                  kind='mergesort')
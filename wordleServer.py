@@ -0,0 +1,219 @@
+# Solver as a long running HTTP/JSON service
+# One process keeps the shared read-only start state per n_letters in memory (see wordleSolver._start_states) and
+# serves many games at once. Each session is just a solver's own constraint state and remaining row ids.
+# The server is plain asyncio (no web framework needed): the event loop only parses requests, and every solver
+# call runs in a thread pool so a slow ranking never holds up other sessions. Calls for the same session
+# are serialized by a per session lock.
+# Run with `python wordleServer.py [--port 8080] [--preload 5 8]`. Endpoints, all JSON:
+#   GET    /health
+#   POST   /sessions                      {"n_letters": 5}                               -> {"session_id", "n_letters", "remaining"}
+#   POST   /sessions/<id>/process_guess   {"guess": "tares", "response": "_-__+"}        -> {"remaining", "win"}
+#   POST   /sessions/<id>/next_guess      {"sort_on", "model_params", "hard_mode"}       -> {"guess"} (null if no word fits)
+#   POST   /sessions/<id>/top_n_by        {"n", "sort_on", "model_params", "hard_mode"}  -> {"words": [{"word", ...}, ...]}
+#   DELETE /sessions/<id>
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+import uuid
+import numpy
+from wordleEntropy import INFORMATION_SORTS
+from wordleFeatures import FEATURES
+from wordleSolver import DEFAULT_MODEL_PARAMS, wordleSolver
+
+MAX_BODY = 1 << 20
+# Columns a session can weight in model_params, and sort on besides model_rank and the information sorts
+SCORE_COLUMNS = ['freq'] + FEATURES
+
+class httpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+               500: 'Internal Server Error'}
+
+
+class wordleServer:
+    def __init__(self, workers: int = 4, session_ttl: float = 3600):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.session_ttl = session_ttl
+        self.sessions = {}
+        # Only one thread builds the start state for a length, the rest wait for it
+        self.start_lock = threading.Lock()
+
+    # A fresh solver for a game, building the shared start state the first time a length is used
+    def new_solver(self, n_letters: int) -> wordleSolver:
+        with self.start_lock:
+            return wordleSolver(n_letters)
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def session(self, session_id: str) -> dict:
+        if session_id not in self.sessions:
+            raise httpError(404, f"no session {session_id}")
+        session = self.sessions[session_id]
+        session['last_used'] = time.monotonic()
+        return session
+
+    # Drop sessions nobody has used in session_ttl seconds
+    def expire_sessions(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for session_id in [s for s, session in self.sessions.items() if session['last_used'] < cutoff]:
+            del self.sessions[session_id]
+
+    async def create_session(self, body: dict) -> dict:
+        n_letters = body.get('n_letters', 5)
+        if not isinstance(n_letters, int) or not 2 <= n_letters <= 15:
+            raise httpError(400, "n_letters must be an integer from 2 to 15")
+        self.expire_sessions()
+        solver = await self.run(self.new_solver, n_letters)
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = {'solver': solver, 'lock': asyncio.Lock(), 'last_used': time.monotonic()}
+        return {'session_id': session_id, 'n_letters': n_letters, 'remaining': len(solver.rows)}
+
+    async def process_guess(self, session: dict, body: dict) -> dict:
+        solver = session['solver']
+        guess, response = body.get('guess'), body.get('response')
+        if not isinstance(guess, str) or len(guess) != solver.n_letters or not guess.isalpha():
+            raise httpError(400, f"guess must be a {solver.n_letters} letter word")
+        if not isinstance(response, str) or len(response) != solver.n_letters or set(response) - set('+-_'):
+            raise httpError(400, f"response must be {solver.n_letters} of + - _")
+        guess = guess.lower()
+
+        def process():
+            solver.process_guess(guess, list(response))
+            return len(solver.rows)
+
+        remaining = await self.run(process)
+        return {'remaining': remaining, 'win': response == '+' * solver.n_letters}
+
+    # sort_on, model_params and hard_mode from a request body, checked before they reach the solver
+    def ranking_args(self, body: dict) -> tuple:
+        sort_on = body.get('sort_on', 'model_rank')
+        if sort_on != 'model_rank' and sort_on not in SCORE_COLUMNS and sort_on not in INFORMATION_SORTS:
+            raise httpError(400, f"sort_on must be one of {', '.join(['model_rank'] + SCORE_COLUMNS + INFORMATION_SORTS)}")
+        model_params = body.get('model_params', DEFAULT_MODEL_PARAMS)
+        if not isinstance(model_params, dict) or not model_params or set(model_params) - set(SCORE_COLUMNS) or \
+                not all(isinstance(w, (int, float)) and not isinstance(w, bool) for w in model_params.values()):
+            raise httpError(400, f"model_params must map one or more of {', '.join(SCORE_COLUMNS)} to numbers")
+        hard_mode = body.get('hard_mode', True)
+        if not isinstance(hard_mode, bool):
+            raise httpError(400, "hard_mode must be true or false")
+        return sort_on, model_params, hard_mode
+
+    async def next_guess(self, session: dict, body: dict) -> dict:
+        solver = session['solver']
+        args = self.ranking_args(body)
+
+        # null once no word fits the responses given (e.g. a mistyped response)
+        def guess():
+            return str(solver.next_guess(*args)) if len(solver.rows) else None
+
+        return {'guess': await self.run(guess)}
+
+    async def top_n_by(self, session: dict, body: dict) -> dict:
+        solver = session['solver']
+        n = body.get('n', 20)
+        if not isinstance(n, int) or isinstance(n, bool) or n < 1:
+            raise httpError(400, "n must be a positive integer")
+        top = await self.run(solver.top_n_by, n, *self.ranking_args(body))
+        return {'words': json.loads(top.to_json(orient='records'))}
+
+    # Route a request to its handler. Returns the JSON response body
+    async def handle(self, method: str, path: str, body: dict) -> dict:
+        parts = [p for p in path.split('?')[0].split('/') if p]
+        if parts == ['health']:
+            return {'status': 'ok', 'sessions': len(self.sessions)}
+        if parts == ['sessions'] and method == 'POST':
+            return await self.create_session(body)
+        if len(parts) == 2 and parts[0] == 'sessions' and method == 'DELETE':
+            self.session(parts[1])
+            del self.sessions[parts[1]]
+            return {'deleted': parts[1]}
+        if len(parts) == 3 and parts[0] == 'sessions':
+            actions = {'process_guess': self.process_guess, 'next_guess': self.next_guess, 'top_n_by': self.top_n_by}
+            if parts[2] not in actions:
+                raise httpError(404, f"unknown action {parts[2]}")
+            if method != 'POST':
+                raise httpError(405, f"{parts[2]} needs a POST")
+            session = self.session(parts[1])
+            async with session['lock']:
+                return await actions[parts[2]](session, body)
+        raise httpError(404, f"no route for {method} {path}")
+
+    # One client connection. Keep-alive, so a client can send many requests on it one after another
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                status, result = 200, None
+                try:
+                    if length > MAX_BODY:
+                        raise httpError(413, "request body too large")
+                    raw = await reader.readexactly(length) if length else b''
+                    try:
+                        body = json.loads(raw) if raw else {}
+                    except ValueError:
+                        raise httpError(400, "body must be JSON")
+                    result = await self.handle(method.upper(), path, body)
+                except httpError as e:
+                    status, result = e.status, {'error': e.message}
+                except Exception as e:
+                    status, result = 500, {'error': repr(e)}
+                payload = json.dumps(result, default=json_default).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                             .encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive or status == 413:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080, preload: list = []):
+        for n_letters in preload:
+            await self.run(self.new_solver, n_letters)
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f"wordle solver serving on http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+# numpy scalars (e.g. from top_n_by) as plain JSON numbers
+def json_default(value):
+    if isinstance(value, numpy.generic):
+        return value.item()
+    raise TypeError(f"{type(value)} isn't JSON serializable")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Wordle solver HTTP/JSON server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=4, help='threads for solver calls')
+    parser.add_argument('--preload', type=int, nargs='*', default=[5], help='word lengths to load before serving')
+    parser.add_argument('--session-ttl', type=float, default=3600, help='seconds before an idle session is dropped')
+    args = parser.parse_args()
+    try:
+        asyncio.run(wordleServer(args.workers, args.session_ttl).serve(args.host, args.port, args.preload))
+    except KeyboardInterrupt:
+        pass
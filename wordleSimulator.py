@@ -1,11 +1,15 @@
-import csv
 import datetime
 from logging import log
-from random import randint
+import multiprocessing
+import random
 import pandas
 from wordleGame import wordleGame
-from wordleSolver import wordleSolver
-from os.path import exists
+from wordleSolver import PROFILE_PHASES, wordleSolver
+from wordleMultiSolver import wordleMultiSolver
+from wordleFeedback import load_feedback_table
+from wordleBook import openingBook
+from wordleLog import open_sink
+from wordleTree import load_strategy_tree
 import hashlib
 import time
 
@@ -15,107 +19,252 @@ import time
 # * Create data structure of per-game info on number of guesses to correct to compare
 # * Further wrap simulator in for loop with various params for each of the above, like a matrix of outcomes
 
+GAME_LOG_COLUMNS = ['game_id', 'start_at', 'completed_at', 'n_letters', 'first_guess', 'sort_on', 'model_params', 'word', 'turns']
+TURN_LOG_HEADER = ['game_id', 'turn_number', 'guess', \
+    'words_possible', 'letters_in', 'letters_out', 'pos_yes', 'pos_no', \
+    'freq', 'letter_score_by_word', 'letter_score_by_freq', 'distinct_letters', \
+    'letter_pos_score_by_word', 'letter_pos_score_by_freq', \
+    'model_params', 'model_rank', 'response']
+TURN_LOG_COLUMNS = ['game_id', 'turn_number', 'guess', \
+    'words_possible', 'letters_in', 'letters_out', 'pos_yes', 'pos_no', \
+    'freq', 'letter_score_by_word', 'letter_score_by_freq', 'distinct_letters', \
+    'letter_score_pos_perc', 'letter_score_pos_freq', \
+    'model_params', 'model_rank', 'response']
+# Column kinds for the columnar log formats (see wordleLog)
+GAME_LOG_TYPES = {'game_id': 'str', 'start_at': 'datetime', 'completed_at': 'datetime', 'n_letters': 'int', 'first_guess': 'str',
+                  'sort_on': 'str', 'model_params': 'params', 'word': 'str', 'turns': 'int'}
+TURN_LOG_TYPES = {'game_id': 'str', 'turn_number': 'int', 'guess': 'str', 'words_possible': 'int',
+                  'letters_in': 'list', 'letters_out': 'list', 'pos_yes': 'nested', 'pos_no': 'nested',
+                  'freq': 'float', 'letter_score_by_word': 'float', 'letter_score_by_freq': 'float', 'distinct_letters': 'float',
+                  'letter_score_pos_perc': 'float', 'letter_score_pos_freq': 'float',
+                  'model_params': 'params', 'model_rank': 'float', 'response': 'str'}
+# Extra turn_log columns with profile=True: seconds spent in each solver phase during the turn
+PROFILE_COLUMNS = [f"seconds_{phase}" for phase in PROFILE_PHASES]
+
+# Multi-board games stop after this many turns even if some boards are unsolved (an answer outside the corpus can't be found)
+MULTI_BOARD_MAX_TURNS = 40
+
+# Per process simulation state. Loaded once per process (or pool worker) by init_worker and reused for every game
+_worker = {}
+
+def init_worker(n_letters: int, feedback_table: bool, seed: int, settings: dict):
+    # Precomputed responses shared by every game and solver (memory mapped, so workers share the pages)
+    table = None
+    if feedback_table:
+        table = load_feedback_table(wordleSolver(n_letters).remaining_words(), n_letters)
+    # Each process keeps its own in-memory opening book of guesses per turn history
+    book = openingBook() if settings['opening_book'] else None
+    # or follows the precomputed strategy tree (memory mapped like the feedback table)
+    tree = None
+    if settings['strategy_tree']:
+        tree = load_strategy_tree(wordleSolver(n_letters), start_word=settings['start_word'])
+    if settings['boards'] > 1:
+        # One solver tracking every board and a game per board, all boards getting each guess
+        _worker['solver'] = wordleMultiSolver(n_letters, settings['boards'], feedback_table=table)
+        _worker['games'] = [wordleGame(n_letters=n_letters, feedback_table=table) for _ in range(settings['boards'])]
+    else:
+        _worker['solver'] = wordleSolver(n_letters, feedback_table=table, opening_book=book, strategy_tree=tree,
+                                         profile=settings['profile'])
+        _worker['game'] = wordleGame(n_letters=n_letters, random_word=settings['word'] is None,
+                                     starter_word=settings['word'] or '', feedback_table=table)
+    _worker['seed'] = seed
+    _worker['settings'] = settings
+
+# Every game gets its own random source derived from the run seed, so results don't depend on
+# which worker plays it or in what order
+def game_rng(seed: int, game_num: int) -> random.Random:
+    return random.Random(f"{seed}-{game_num}")
+
+# Create game_id from hash of the run seed and game number. Will use this to join game and turnid later
+def make_game_id(seed: int, game_num: int) -> str:
+    hash = hashlib.sha1()
+    hash.update(f"{seed}-{game_num}".encode('utf-8'))
+    return str(game_num) + str(hash.hexdigest()[:12])
+
+# Plays game number game_num with the process's solver and game. Returns the game_log row, turn_log rows
+# and (with profile) the solver's timing records, tagged with the game and turn
+def simulate_game(game_num: int) -> tuple:
+    if _worker['settings']['boards'] > 1:
+        return simulate_multi_game(game_num)
+    wordle_solver, wordle_game, settings = _worker['solver'], _worker['game'], _worker['settings']
+    rng = game_rng(_worker['seed'], game_num)
+    wordle_solver.reset()
+    # If repeating word the game keeps the word the solver (ha!) picked at the start of the run
+    wordle_game.reset(settings['word'] or '', rng=rng)
+
+    # Setup logging for game
+    game_attributes = {'start_at': datetime.datetime.now(), 'sort_on': settings['sort_on'],
+                       'model_params': settings['model_params'], 'n_letters': settings['n_letters']}
+    
+    game_id = make_game_id(_worker['seed'], game_num)
+    game_attributes['game_id'] = game_id
+
+    turn_rows = []
+    timings = []
+    turn = 1
+    game_on = True
+    while game_on:
+            
+        if turn == 1 and settings['start_word']:
+            guess = settings['start_word']
+        else:
+            if settings['random_guess']:
+                words = wordle_solver.remaining_words()
+                guess = words[rng.randint(0, len(words)-1)]
+            else:
+                guess = wordle_solver.next_guess()
+        
+        if turn == 1:
+            game_attributes['first_guess'] = guess
+
+        response = wordle_game.respond_guess(guess)
+
+        if settings['turn_log']:
+            word_info = wordle_solver.word_features(guess)
+            turn_attributes = {'game_id': game_id,
+                'turn_number': turn,
+                'guess': guess,
+                'words_possible': len(wordle_solver.rows),
+                'letters_in': list(wordle_solver.letters_in),
+                'letters_out': list(wordle_solver.letters_out),
+                'pos_yes': [list(pos_yes) for pos_yes in wordle_solver.pos_yes],
+                'pos_no': [list(pos_no) for pos_no in wordle_solver.pos_no]}
+            for c in ['freq', 'letter_score_by_word', 'letter_score_by_freq', 'distinct_letters','model_rank', \
+                'letter_score_pos_perc', 'letter_score_pos_freq']:
+                turn_attributes[c] = word_info[c]
+            turn_attributes['model_params'] = settings['model_params']
+            turn_attributes['response'] = response['response']
+            turn_rows.append([turn_attributes[key] for key in TURN_LOG_COLUMNS])
+        
+        # print(f"Turn: {turn}. Guess: {guess}, Response: {response['response']}")
+        
+        if response['win']:
+            game_attributes['word'] = guess
+            game_attributes['completed_at'] = datetime.datetime.now()
+            game_attributes['turns'] = turn
+            # print(f"Won in {turn} turns")
+            game_on = False
+        
+        wordle_solver.process_guess(guess, response["response"])
+        if settings['profile']:
+            turn_timings = [{'game_id': game_id, 'turn': turn, **record} for record in wordle_solver.pop_timings()]
+            timings.extend(turn_timings)
+            if settings['turn_log']:
+                turn_rows[-1].extend(sum(t['seconds'] for t in turn_timings if t['phase'] == phase) for phase in PROFILE_PHASES)
+        turn += 1
+
+    return [game_attributes[key] for key in GAME_LOG_COLUMNS], turn_rows, timings
+
+# Multi-board version of simulate_game: every unsolved board gets each guess until all are solved.
+# The game_log row's word is the boards' words joined by commas, and turns the guesses it took to solve them all
+# (0 if it stopped first)
+def simulate_multi_game(game_num: int) -> tuple:
+    wordle_solver, wordle_games, settings = _worker['solver'], _worker['games'], _worker['settings']
+    rng = game_rng(_worker['seed'], game_num)
+    wordle_solver.reset()
+    for wordle_game in wordle_games:
+        wordle_game.reset(rng=rng)
+    game_attributes = {'start_at': datetime.datetime.now(), 'sort_on': settings['sort_on'], 'model_params': settings['model_params'],
+                       'n_letters': settings['n_letters'], 'game_id': make_game_id(_worker['seed'], game_num),
+                       'word': ','.join(wordle_game.word for wordle_game in wordle_games)}
+
+    turn = 1
+    while not all(wordle_solver.solved) and turn <= MULTI_BOARD_MAX_TURNS:
+        if turn == 1 and settings['start_word']:
+            guess = settings['start_word']
+        elif settings['random_guess']:
+            words = [w for board_words in wordle_solver.remaining_words() for w in board_words]
+            guess = words[rng.randint(0, len(words) - 1)] if words else None
+        else:
+            guess = wordle_solver.next_guess()
+        if guess is None:
+            break
+        if turn == 1:
+            game_attributes['first_guess'] = guess
+        responses = [wordle_game.respond_guess(guess)['response'] if not wordle_solver.solved[b] else None
+                     for b, wordle_game in enumerate(wordle_games)]
+        wordle_solver.process_guess(guess, responses)
+        turn += 1
+
+    game_attributes['completed_at'] = datetime.datetime.now()
+    # 0 turns for a game stopped before every board was solved, as in wordleEval.summarize_turns
+    game_attributes['turns'] = turn - 1 if all(wordle_solver.solved) else 0
+    return [game_attributes.get(key) for key in GAME_LOG_COLUMNS], [], []
+
+# p50 / p95 / mean seconds per phase (and how many times each ran) from the timing records of a run
+def timing_summary(timings: list) -> pandas.DataFrame:
+    if not timings:
+        return pandas.DataFrame(columns=['count', 'p50', 'p95', 'mean', 'total'])
+    seconds = pandas.DataFrame(timings).groupby('phase')['seconds']
+    summary = pandas.DataFrame({'count': seconds.count(), 'p50': seconds.quantile(0.5), 'p95': seconds.quantile(0.95),
+                                'mean': seconds.mean(), 'total': seconds.sum()})
+    return summary.reindex([phase for phase in PROFILE_PHASES if phase in summary.index])
+
+# workers > 1 plays games across a process pool. Each worker loads the corpus and builds its solver once,
+# and rows come back to this process which is the only one writing the logs (in game order)
+# seed makes the run reproducible: the same seed gives the same words, guesses and game_ids for any number of workers
+# Logs are csv unless the path ends in .parquet, .arrow or .npz (see wordleLog), written every log_batch_size rows
+# profile=True times each phase of the solver's turns, adds the seconds per phase to turn_log and
+# returns the timing_summary of the run
+# boards > 1 plays multi-board games (see wordleMultiSolver and simulate_multi_game), which only write game_log
 def run_simulation(n_letters:int = 5, sims:int = 1000, game_log:str = None, turn_log:str = None,
         start_word:str = None, sort_on:str = 'model_rank', model_params:dict = \
                     {'freq': 1, 'letter_score_by_word': 1, 'letter_score_by_freq': 1, 'distinct_letters': 1}, \
-                    same_word: bool = False, random_guess: bool = False):
+                    same_word: bool = False, random_guess: bool = False, feedback_table: bool = False,
+                    workers: int = 1, seed: int = None, opening_book: bool = False, log_batch_size: int = 1000,
+                    strategy_tree: bool = False, profile: bool = False, boards: int = 1):
     
-    game_num = 0
-    if game_log:
-        if not exists(game_log):
-            game_log_file = csv.writer(open(game_log, 'w'))
-            game_log_file.writerow(['game_id', 'start_at', 'completed_at', 'n_letters', 'first_guess', 'sort_on', 'model_params', 'word', 'turns'])
-        else:
-            game_log_file = csv.writer(open(game_log, 'a'))
-
-    if turn_log:
-        if not exists(turn_log):
-            turn_log_file = csv.writer(open(turn_log, 'w'))
-            turn_log_file.writerow(['game_id', 'turn_number', 'guess', \
-                'words_possible', 'letters_in', 'letters_out', 'pos_yes', 'pos_no', \
-                'freq', 'letter_score_by_word', 'letter_score_by_freq', 'distinct_letters', \
-                'letter_pos_score_by_word', 'letter_pos_score_by_freq', \
-                'model_params', 'model_rank', 'response'])
-        else:
-            turn_log_file = csv.writer(open(turn_log, 'a'))
+    if seed is None:
+        seed = time.time_ns()
+    if boards > 1 and (turn_log or same_word or strategy_tree or opening_book or profile):
+        raise ValueError("multi-board games only support game_log, start_word, random_guess, feedback_table and workers")
 
+    if feedback_table:
+        # Build the table once up front rather than racing to build it in every worker
+        load_feedback_table(wordleSolver(n_letters).remaining_words(), n_letters)
+    if strategy_tree:
+        # Same for the strategy tree. Games call next_guess() with its defaults, so that's what the tree is built for
+        load_strategy_tree(wordleSolver(n_letters), start_word=start_word)
+
+    word = None
     if same_word:
         pick_starter_solver = wordleSolver(n_letters)
-        word = pick_starter_solver.possible_words.iloc[randint(0, 10000)][0]
+        word = pick_starter_solver.remaining_words()[random.Random(seed).randint(0, 10000)]
 
-    while game_num < sims:
-        # Create new solver
-        wordle_solver = wordleSolver(n_letters)
+    settings = {'n_letters': n_letters, 'start_word': start_word, 'sort_on': sort_on, 'model_params': model_params,
+                'random_guess': random_guess, 'turn_log': bool(turn_log), 'word': word, 'opening_book': opening_book,
+                'strategy_tree': strategy_tree, 'profile': profile, 'boards': boards}
 
-        # If repeating word use the solver (ha!) to pick which word, then 
-        if same_word:
-            wordle_game = wordleGame(n_letters=n_letters, random_word=False, starter_word=word)
+    game_sink = open_sink(game_log, GAME_LOG_COLUMNS, GAME_LOG_TYPES, log_batch_size) if game_log else None
+    turn_columns, turn_types, turn_header = TURN_LOG_COLUMNS, TURN_LOG_TYPES, TURN_LOG_HEADER
+    if profile:
+        turn_columns, turn_header = turn_columns + PROFILE_COLUMNS, turn_header + PROFILE_COLUMNS
+        turn_types = {**turn_types, **{col: 'float' for col in PROFILE_COLUMNS}}
+    turn_sink = open_sink(turn_log, turn_columns, turn_types, log_batch_size, header=turn_header) if turn_log else None
+    timings = []
+    try:
+        if workers > 1:
+            with multiprocessing.Pool(workers, initializer=init_worker, initargs=(n_letters, feedback_table, seed, settings)) as pool:
+                games = pool.imap(simulate_game, range(sims), chunksize=max(1, sims // (workers * 8)))
+                write_games(games, game_sink, turn_sink, timings)
         else:
-            wordle_game = wordleGame(n_letters=n_letters)
-
-        # Setup logging for game
-        game_attributes = {'start_at': datetime.datetime.now(), 'sort_on': sort_on, 'model_params': model_params, 'n_letters': n_letters}
-        
-        # Create game_id from hash of current_time. Will use this to join game and turnid later
-        hash = hashlib.sha1()
-        hash.update(str(time.time()).encode('utf-8'))
-        game_id = str(game_num) + str(hash.hexdigest()[:12])
-        game_attributes['game_id'] = game_id
-
-        turn = 1
-        game_on = True
-        while game_on:
-                
-            if turn == 1 and start_word:
-                guess = start_word
-            else:
-                if random_guess:
-                    guess = wordle_solver.possible_words.iloc[randint(0, len(wordle_solver.possible_words)-1)][0]
-                else:
-                    guess = wordle_solver.next_guess()
-            
-            if turn == 1:
-                game_attributes['first_guess'] = guess
-
-            response = wordle_game.respond_guess(guess)
-
-            if turn_log:
-                wordle_solver.top_n_by(1)
-                word_info = wordle_solver.possible_words[wordle_solver.possible_words['word'] == guess]
-                turn_attributes = {'game_id': game_id,
-                    'turn_number': turn,
-                    'guess': guess,
-                    'words_possible': len(wordle_solver.possible_words),
-                    'letters_in': list(wordle_solver.letters_in),
-                    'letters_out': list(wordle_solver.letters_out),
-                    'pos_yes': [list(pos_yes) for pos_yes in wordle_solver.pos_yes],
-                    'pos_no': [list(pos_no) for pos_no in wordle_solver.pos_no]}
-                for c in ['freq', 'letter_score_by_word', 'letter_score_by_freq', 'distinct_letters','model_rank', \
-                    'letter_score_pos_perc', 'letter_score_pos_freq']:
-                    turn_attributes[c] = word_info.iloc[0][c]
-                turn_attributes['model_params'] = model_params
-                turn_attributes['response'] = response['response']
-                turn_log_file.writerow([turn_attributes[key] for key in ['game_id', 'turn_number', 'guess', \
-                    'words_possible', 'letters_in', 'letters_out', 'pos_yes', 'pos_no', \
-                    'freq', 'letter_score_by_word', 'letter_score_by_freq', 'distinct_letters', \
-                    'letter_score_pos_perc', 'letter_score_pos_freq', \
-                    'model_params', 'model_rank', 'response']])
-            
-            # print(f"Turn: {turn}. Guess: {guess}, Response: {response['response']}")
-            
-            if response['win']:
-                game_attributes['word'] = guess
-                game_attributes['completed_at'] = datetime.datetime.now()
-                game_attributes['turns'] = turn
-                # print(f"Won in {turn} turns")
-                if game_log:
-                    game_log_file.writerow([game_attributes[key] for key in ['game_id', 'start_at', 'completed_at', 'n_letters', 'first_guess', 'sort_on', 'model_params', 'word', 'turns']])
-                game_on = False
-            
-            wordle_solver.process_guess(guess, response["response"])
-            turn += 1
+            init_worker(n_letters, feedback_table, seed, settings)
+            write_games(map(simulate_game, range(sims)), game_sink, turn_sink, timings)
+    finally:
+        # Closing flushes whatever is still buffered, even if a game raised
+        for sink in [game_sink, turn_sink]:
+            if sink:
+                sink.close()
+    if profile:
+        return timing_summary(timings)
 
-        game_num += 1
+def write_games(games, game_sink, turn_sink, timings: list):
+    for game_row, turn_rows, game_timings in games:
+        timings.extend(game_timings)
+        if turn_sink:
+            turn_sink.write(turn_rows)
+        if game_sink:
+            game_sink.write([game_row])
             
 
     # For when you are running a game via the command line
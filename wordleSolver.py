@@ -5,52 +5,211 @@
 # The composite rank scores the various features based on simulations I ran - check out  wordleSimulator.py
 
 # This can be improved by (1) ranking guesses by entropy (value of guess in reducing universe of potential words)
+# - next_guess(sort_on='entropy') now does this over a capped set of guesses, see rank_by_information
 # and (2) incorporating prior guesses/results to dynamically improve model weights
 # and (3) using the actual wordle corpus of words. I found it more fun to make it more general
 
+from contextlib import contextmanager
 from typing import List
-from wordfreq import get_frequency_dict
+import copy
+import time
+import numpy
 import pandas
-
+from wordleCorpus import start_words
+from wordleFilter import wordleFilter
+from wordleFeatures import FEATURES, letter_presence, normalize_features, score_features
+from wordleFeedback import corpus_hash, feedback_codes
+from wordleEntropy import INFORMATION_SORTS, information_scores, top_indices
+
+DEFAULT_MODEL_PARAMS = {'freq': 1, 'letter_score_by_word': 1, 'letter_score_by_freq': 1,
+                        'letter_score_pos_perc': 1, 'letter_score_pos_freq': 1, 'distinct_letters': 1}
+
+# Phases recorded by profile=True (see wordleSolver.timed): loading the corpus, updating the constraints from a response,
+# filtering the remaining words, letter scoring, normalizing features, model_rank, picking the guess from it,
+# rank_by_information and opening book / strategy tree lookups
+PROFILE_PHASES = ['load_corpus', 'process_guess', 'filter', 'update_letter_scores', 'normalize', 'rank', 'select',
+                  'information', 'lookup']
+
+# Positions of the n largest values, in the order sort_values(ascending=False) puts them (NaNs last, ties included).
+# A partial selection (argmax / argpartition) finds them without sorting everything, and only if a tie (or NaN)
+# could make that order depend on pandas' sort algorithm does it fall back to the full Series sort
+def top_n_positions(values: numpy.ndarray, n: int) -> numpy.ndarray:
+    values = numpy.asarray(values)
+    if 0 < n < len(values) and not numpy.isnan(values).any():
+        if n == 1:
+            best = values.argmax()
+            if (values == values[best]).sum() == 1:
+                return numpy.array([best])
+        else:
+            top = numpy.argpartition(-values, n)[:n + 1]
+            top = top[numpy.argsort(-values[top], kind='mergesort')]
+            # The order of the top n is only certain when none of them tie with each other or with the next one
+            if len(numpy.unique(values[top])) == n + 1:
+                return top[:n]
+    return pandas.Series(values).sort_values(ascending=False).index[:n].to_numpy()
+
+# Turn 0 state for each n_letters: the encoded corpus, word frequencies and the scored features of every word.
+# Built once per process and shared by every solver. Nothing in it is ever written to after it's built
+_start_states = {}
+
+# The solver's state is compact: the shared encoded corpus (word_filter) plus `rows`, the corpus row ids of the
+# words still possible, which every guess narrows. Features are only computed for those rows, and only when
+# something needs them. possible_words is a DataFrame view of the same state built on demand
 class wordleSolver:
-    def __init__(self, n_letters: int):
+    def __init__(self, n_letters: int, feedback_table = None, opening_book = None, strategy_tree = None, profile: bool = False):
         self.n_letters = n_letters
+        self.pending_guesses = []
+        # Opt-in per phase timing. With profile=True every timed phase of a turn appends
+        # {'guesses', 'phase', 'seconds', 'survivors'} here (see timed), None otherwise
+        self.timings = [] if profile else None
+        if n_letters not in _start_states:
+            # Building the start state scores the corpus, which is counted as part of load_corpus only
+            timings, self.timings = self.timings, None
+            start = time.perf_counter()
+            _start_states[n_letters] = self.build_start_state()
+            self.timings = timings
+            if profile:
+                self.timings.append({'guesses': 0, 'phase': 'load_corpus', 'seconds': time.perf_counter() - start,
+                                     'survivors': len(_start_states[n_letters]['rows'])})
+        self.start_state = _start_states[n_letters]
+        # Encoded copy of the starting corpus. rows (and the index of possible_words) are row ids into it
+        self.word_filter = self.start_state['word_filter']
+        self.freq = self.start_state['freq']
+        # Optional wordleFeedback.feedbackTable for the same corpus, used to look up response codes for the information
+        # sorts. Filtering always goes by the letter constraints (which don't count letters the way the table's exact
+        # responses do), so the words kept and the guesses made are the same with or without a table
+        self.feedback_table = feedback_table
+        if feedback_table and feedback_table.corpus_hash != self.start_state['corpus_hash']:
+            raise ValueError("Feedback table was built for a different corpus")
+        # Optional wordleBook.openingBook. When set next_guess checks it first and filtering/scoring is
+        # deferred until the remaining words are actually read, so a book hit skips both
+        self.opening_book = opening_book
+        # Optional wordleTree.strategyTree for the same corpus. While the game follows it next_guess is a lookup
+        # (whatever settings are passed, the tree's are used) and filtering is deferred the same way as with a book
+        self.strategy_tree = strategy_tree
+        if strategy_tree and strategy_tree.corpus_hash != self.start_state['corpus_hash']:
+            raise ValueError("Strategy tree was built for a different corpus")
+        self.reset()
+
+    # Times one of PROFILE_PHASES, recording the guesses processed so far and the words still possible after it
+    @contextmanager
+    def timed(self, phase: str):
+        if self.timings is None:
+            yield
+            return
+        start = time.perf_counter()
+        yield
+        self.timings.append({'guesses': len(self.guesses), 'phase': phase, 'seconds': time.perf_counter() - start,
+                             'survivors': len(self._rows)})
+
+    # Timing records since the last call, e.g. once per turn
+    def pop_timings(self) -> list:
+        timings, self.timings = self.timings, [] if self.timings is not None else None
+        return timings or []
+
+    # Corpus row ids of the remaining words. Brings the filtering up to date with any guesses not applied yet
+    @property
+    def rows(self) -> numpy.ndarray:
+        if self.pending_guesses:
+            self.apply_pending_guesses()
+        return self._rows
+
+    def remaining_words(self) -> numpy.ndarray:
+        return self.word_filter.words[self.rows]
+
+    # How many words are still possible. While the game follows a strategy tree it's the count recorded in the tree,
+    # so the deferred filtering isn't forced
+    def n_remaining(self) -> int:
+        if self.tree_node is not None:
+            return int(self.strategy_tree.candidates[self.tree_node])
+        return len(self.rows)
+
+    # Remaining words with their features (and model_rank once ranked) as a DataFrame indexed by corpus row id
+    # Built from the compact state the first time it's read each turn
+    @property
+    def possible_words(self) -> pandas.DataFrame:
+        if self.frame is None:
+            features = self.scored_features()
+            self.frame = pandas.DataFrame({'word': self.remaining_words(), **features}, index=self.rows)
+            if self.model_rank is not None:
+                self.frame['model_rank'] = self.model_rank
+        return self.frame
+
+    # Replace the remaining words with the rows of a DataFrame indexed by corpus row id. Call update_state to rescore
+    @possible_words.setter
+    def possible_words(self, words: pandas.DataFrame):
+        self.pending_guesses = []
+        self.applied_constraints = self.constraints()
+        self._rows = words.index.values.astype(numpy.int32)
+        self.features = None
+        self.model_rank = None
+        self.frame = words
+
+    # Loads and scores the starting corpus. Only runs for the first solver of each n_letters in a process
+    def build_start_state(self) -> dict:
+        corpus = start_words(self.n_letters)
+        self.letters_in = set()
+        self.letters_out = set()
+        self.pos_yes = [set() for _ in range(self.n_letters)]
+        self.pos_no = [set() for _ in range(self.n_letters)]
+        self.word_filter = wordleFilter(corpus.words, self.n_letters)
+        self.freq = corpus.freq.astype(numpy.float64)
+        self._rows = numpy.arange(len(corpus), dtype=numpy.int32)
+        self.update_state()
+        return {'rows': self._rows, 'features': self.features, 'word_filter': self.word_filter, 'freq': self.freq,
+                'corpus_hash': corpus_hash(corpus.words),
+                'letter_scores_by_word': self.letter_scores_by_word, 'letter_scores_by_freq': self.letter_scores_by_freq,
+                'letter_scores_pos_perc': self.letter_scores_pos_perc, 'letter_scores_pos_freq': self.letter_scores_pos_freq}
+
+    # Back to turn 0 for a new game. Doesn't copy any word data so it's close to free
+    def reset(self):
         self.letters_in = set()
         self.letters_out = set()
-        self.pos_yes = [set() for _ in range(n_letters)]
-        self.pos_no = [set() for _ in range(n_letters)]
+        self.pos_yes = [set() for _ in range(self.n_letters)]
+        self.pos_no = [set() for _ in range(self.n_letters)]
         self.guesses = []
-        self.possible_words = self.load_start_words()
-        self.letter_scores_by_word = {}
-        self.letter_scores_by_freq = {}
-        self.letter_scores_pos_perc = [dict() for _ in range(self.n_letters)]
-        self.letter_scores_pos_freq = [dict() for _ in range(self.n_letters)]
+        self.pending_guesses = []
+        self.applied_constraints = self.constraints()
+        # Current strategy_tree node, None once the game leaves the tree
+        self.tree_node = 0 if self.strategy_tree is not None else None
+        self._rows = self.start_state['rows']
+        self.features = self.start_state['features']
+        self.model_rank = None
+        self.model_rank_params = None
+        self.frame = None
+        self.letter_scores_by_word = self.start_state['letter_scores_by_word']
+        self.letter_scores_by_freq = self.start_state['letter_scores_by_freq']
+        self.letter_scores_pos_perc = self.start_state['letter_scores_pos_perc']
+        self.letter_scores_pos_freq = self.start_state['letter_scores_pos_freq']
+        # Cost of the last entropy / expected_remaining ranking: seconds, guesses scored and answers bucketed
+        self.rank_timing = {}
+
+    # Independent copy of this solver at its current turn, e.g. to explore a guess without playing it
+    # Constraints are copied, word data is shared the same way as reset (arrays are replaced, never written to)
+    def clone(self):
+        other = copy.copy(self)
+        other.letters_in = set(self.letters_in)
+        other.letters_out = set(self.letters_out)
+        other.pos_yes = [set(pos) for pos in self.pos_yes]
+        other.pos_no = [set(pos) for pos in self.pos_no]
+        other.guesses = list(self.guesses)
+        other.pending_guesses = list(self.pending_guesses)
+        other.frame = None
+        other.rank_timing = {}
+        other.timings = [] if self.timings is not None else None
+        return other
 
-        self.update_state()        
-        
-    # Load potential words for this length. If I've already downloaded the corpus re-use it. 
-    def load_start_words(self):
-        try:
-            return pandas.read_pickle(f"./start_words/start_words_{self.n_letters}_letters.pkl")
-        except:
-            pos_words = self.possible_words()
-            pos_words.to_pickle(f"./start_words/start_words_{self.n_letters}_letters.pkl")
-            return pos_words
-
-    # Return list of all possible words of n_letter length as a dict including wordfreq
-    def possible_words(self) -> List[int]:
-        freq_dict = get_frequency_dict('en', wordlist='best')
-        n_letter_words = []
-        for w in freq_dict.items():
-            if len(w[0]) == self.n_letters and w[0].isalpha(): #removes non-alpha words like don't
-                n_letter_words.append(w)
-        df = pandas.DataFrame(n_letter_words)
-        df.columns = ['word', 'freq']
-        # arbitrary to take top 20000 words. I chose not to use the wordle corpus so this limits to words people know
-        return df.head(20000)
-    
     # Given a guess and a response update state including updating possible_words and the various scores
     def process_guess(self, guess: str, response: List[int]) -> dict:
+        with self.timed('process_guess'):
+            self.update_constraints(guess, response)
+
+        self.pending_guesses.append({'guess': guess, 'response': response})
+        if self.opening_book is None and self.strategy_tree is None:
+            self.apply_pending_guesses()
+
+    # Letters in / out and position constraints implied by a response
+    def update_constraints(self, guess: str, response: List[int]):
         self.guesses.append({'guess': guess, 'response': response})
         for pos, r in enumerate(response):
             if r == '_':
@@ -59,6 +218,9 @@ class wordleSolver:
                     # do any responses indicate the letter is present (but not in that position)
                     if [response[i] for i, c in enumerate(guess) if c == guess[pos]].count('_') == guess.count(guess[pos]):
                         self.letters_out.add(guess[pos])    
+                    else:
+                        # The word has fewer copies of the letter than the guess, but none of them are here
+                        self.pos_no[pos].add(guess[pos])
                 else:
                     self.letters_out.add(guess[pos])
             elif r == '-':
@@ -68,52 +230,214 @@ class wordleSolver:
                 self.letters_in.add(guess[pos])
                 self.pos_yes[pos].add(guess[pos])
 
-        self.possible_words = self.possible_words[self.possible_words.iloc[:,0:].apply(self.word_in, axis=1)]
-        # Address case when only 1 possible word... in that case just tell them that 1 word! 
-        if len(self.possible_words) != 1:
-            self.update_state()
-
+        if self.tree_node is not None:
+            self.tree_node = self.strategy_tree.child(self.tree_node, guess, response)
+
+    # Narrow the remaining rows by the guesses processed since they were last filtered
+    # Only the constraints added since then are checked, the remaining rows already satisfy the older ones
+    # Scores are recomputed lazily, the next time something needs them
+    def apply_pending_guesses(self):
+        with self.timed('filter'):
+            self.pending_guesses = []
+            self.keep_rows(self.word_filter.narrow(self._rows, **self.new_constraints()))
+
+    # process_guess for when the rows matching the response are already known, e.g. from one feedback
+    # computation shared by several boards (see wordleMultiSolver). keep is a mask over the current rows
+    def process_matches(self, guess: str, response: List[int], keep: numpy.ndarray):
+        if self.pending_guesses:
+            self.apply_pending_guesses()
+        with self.timed('process_guess'):
+            self.update_constraints(guess, response)
+        with self.timed('filter'):
+            self.keep_rows(keep)
+
+    # Narrow the remaining rows to rows[keep], everything since the last filter having been applied
+    def keep_rows(self, keep: numpy.ndarray):
+        self.applied_constraints = self.constraints()
+        self._rows = self._rows[keep]
+        # Address case when only 1 possible word... in that case just tell them that 1 word! (keeps its last scores)
+        if len(self._rows) == 1 and self.features is not None:
+            self.features = {col: values[keep] for col, values in self.features.items()}
+        else:
+            self.features = None
+        self.model_rank = None
+        self.frame = None
+
+    # Copy of the current constraint sets
+    def constraints(self) -> dict:
+        return {'letters_in': set(self.letters_in), 'letters_out': set(self.letters_out),
+                'pos_yes': [set(pos) for pos in self.pos_yes], 'pos_no': [set(pos) for pos in self.pos_no]}
+
+    # Constraints added since the remaining rows were last filtered, in the form wordleFilter.narrow takes
+    def new_constraints(self) -> dict:
+        applied = self.applied_constraints
+        return {'letters_in': self.letters_in - applied['letters_in'],
+                'letters_out': self.letters_out - applied['letters_out'],
+                'pos_yes': {i: self.pos_yes[i] for i in range(self.n_letters) if self.pos_yes[i] and not applied['pos_yes'][i]},
+                'pos_no': [(i, l) for i in range(self.n_letters) for l in self.pos_no[i] - applied['pos_no'][i]]}
 
     # Package the non-turn based state updates for use during init and as part of turn processing
+    # All features are computed in one vectorized scan of the encoded words (see wordleFeatures)
     def update_state(self):
-        self.update_letter_scores()
+        self.model_rank = None
+        self.frame = None
+        if not len(self.rows):
+            # No words fit the responses (e.g. a mistyped response or a word outside the corpus)
+            self.features = {col: numpy.zeros(0) for col in ['freq'] + FEATURES}
+            return
+        with self.timed('update_letter_scores'):
+            features = self.update_letter_scores()
+        with self.timed('normalize'):
+            self.features = normalize_features({'freq': self.freq[self.rows], **{col: features[col] for col in FEATURES}}, self.n_letters)
+
+    # Normalized features of the remaining words, scoring them first if this turn hasn't been scored yet
+    def scored_features(self) -> dict:
+        if self.pending_guesses:
+            self.apply_pending_guesses()
+        if self.features is None:
+            self.update_state()
+        return self.features
+
+    # model_rank of the remaining words for these feature weights
+    # Computed once per turn: asking again with the same weights (next_guess, top_n_by, word_features) reuses it
+    def rank_words(self, model_params: dict = DEFAULT_MODEL_PARAMS) -> numpy.ndarray:
+        features = self.scored_features()
+        if self.model_rank is not None and self.model_rank_params == model_params:
+            return self.model_rank
+        with self.timed('rank'):
+            # Starting from zeros keeps model_rank an array over the rows even with no weights
+            self.model_rank = sum((model_params[weight] * features[weight] for weight in model_params.keys()),
+                                  numpy.zeros(len(self.rows)))
+            self.model_rank_params = dict(model_params)
+        if self.frame is not None:
+            self.frame['model_rank'] = self.model_rank
+        return self.model_rank
+
+    # Feature values and model_rank of one remaining word, e.g. for logging a turn
+    def word_features(self, word: str, model_params: dict = DEFAULT_MODEL_PARAMS) -> dict:
+        model_rank = self.rank_words(model_params)
+        pos = numpy.flatnonzero(self.remaining_words() == word)[0]
+        return {**{col: values[pos] for col, values in self.features.items()}, 'model_rank': model_rank[pos]}
+
+    # Original row-wise version of update_state. Kept as the reference for wordleFeatures and for benchmarks
+    def update_state_pandas(self):
+        self.update_letter_scores_pandas()
         # Should combine into one scan on the word col
         self.possible_words['letter_score_by_word'] = self.possible_words.apply(lambda row: self.score_word_letter_scores(row[0], False), axis = 1)
         self.possible_words['letter_score_by_freq'] = self.possible_words.apply(lambda row: self.score_word_letter_scores(row[0], True), axis = 1)
         self.possible_words['letter_score_pos_perc'] = self.possible_words.apply(lambda row: self.score_word_pos_scores(row[0], False), axis = 1)
         self.possible_words['letter_score_pos_freq'] = self.possible_words.apply(lambda row: self.score_word_pos_scores(row[0], True), axis = 1)
         self.possible_words['distinct_letters'] = self.possible_words.apply(lambda row: len(set(row[0])), axis = 1)
-        # Normalize model input columns
-        for col in ['freq', 'letter_score_by_word', 'letter_score_by_freq', 'letter_score_pos_perc', 'letter_score_pos_freq']:
-            self.possible_words[col] = self.possible_words[col] / self.possible_words[col].max()
-        
-        # Normalize distinct letters by punishing non-max more
-        self.possible_words['distinct_letters'] = 1 - (2.0 * (self.possible_words['distinct_letters'].max() - self.possible_words['distinct_letters']) / self.n_letters)
-        self.possible_words['distinct_letters'].clip(0, 1)
+        for col, values in normalize_features(self.possible_words, self.n_letters).items():
+            self.possible_words[col] = values
 
 
     # This uses the remaining words and features to propose a single guess
     # Arguments are weights to various features. Should be overridden as we learn moer
-    def next_guess(self, sort_on:str = 'model_rank', model_params:dict = \
-                    {'freq': 1, 'letter_score_by_word': 1, 'letter_score_by_freq': 1,
-                    'letter_score_pos_perc': 1, 'letter_score_pos_freq': 1, 'distinct_letters': 1}) -> str:
+    # sort_on can also be 'entropy' or 'expected_remaining' (see rank_by_information). hard_mode only applies to those
+    def next_guess(self, sort_on:str = 'model_rank', model_params:dict = DEFAULT_MODEL_PARAMS, hard_mode: bool = True) -> str:
         
-        self.possible_words['model_rank'] = sum(model_params[weight] * self.possible_words[weight] for weight in model_params.keys())
-        return self.possible_words.sort_values(sort_on, ascending=False).iloc[0]['word']
+        if self.tree_node is not None:
+            with self.timed('lookup'):
+                guess = self.strategy_tree.guess(self.tree_node)
+            if guess is not None:
+                return guess
+        if self.opening_book is not None:
+            with self.timed('lookup'):
+                key = self.opening_book.key(self.n_letters, self.start_state['corpus_hash'], sort_on, model_params, hard_mode, self.guesses)
+                guess = self.opening_book.get(key)
+            if guess is None:
+                guess = self.rank_next_guess(sort_on, model_params, hard_mode)
+                self.opening_book.put(key, guess)
+            return guess
+        return self.rank_next_guess(sort_on, model_params, hard_mode)
+
+    def rank_next_guess(self, sort_on: str, model_params: dict, hard_mode: bool) -> str:
+        model_rank = self.rank_words(model_params)
+        if sort_on in INFORMATION_SORTS:
+            with self.timed('information'):
+                return self.rank_by_information(sort_on, hard_mode).iloc[0]['word']
+        with self.timed('select'):
+            if sort_on != 'model_rank' and sort_on not in self.features:
+                return self.possible_words.sort_values(sort_on, ascending=False).iloc[0]['word']
+            values = model_rank if sort_on == 'model_rank' else self.features[sort_on]
+            # Same ordering (including ties) as sorting possible_words by the column
+            best = top_n_positions(values, 1)[0]
+            return self.remaining_words()[best]
 
     # Return top n rows ranked by the feature weights
     # Useful to expose to people who want to pick their guess word
-    def top_n_by(self, n:int = 20, sort_on:str = 'model_rank', model_params:dict = \
-                    {'freq': 1, 'letter_score_by_word': 1, 'letter_score_by_freq': 1,
-                    'letter_score_pos_perc': 1, 'letter_score_pos_freq': 1, 'distinct_letters': 1}):
+    def top_n_by(self, n:int = 20, sort_on:str = 'model_rank', model_params:dict = DEFAULT_MODEL_PARAMS, hard_mode: bool = True):
         
-        self.possible_words['model_rank'] = sum(model_params[feature] * self.possible_words[feature] for feature in model_params.keys())
-        return self.possible_words.sort_values(sort_on, ascending=False).head(n)
+        model_rank = self.rank_words(model_params)
+        if sort_on in INFORMATION_SORTS:
+            return self.rank_by_information(sort_on, hard_mode).head(n)
+        if sort_on != 'model_rank' and sort_on not in self.features:
+            return self.possible_words.sort_values(sort_on, ascending=False).head(n)
+        # Only the top n rows of possible_words are built, in the order sorting it by sort_on would give
+        top = top_n_positions(model_rank if sort_on == 'model_rank' else self.features[sort_on], n)
+        return pandas.DataFrame({'word': self.remaining_words()[top], **{col: values[top] for col, values in self.features.items()},
+                                 'model_rank': model_rank[top]}, index=self.rows[top])
+
+    # Rank guesses by the distribution of responses they'd get across the remaining possible words
+    # Highest entropy / lowest expected_remaining first, ties going to words that could still be the answer then model_rank.
+    # hard_mode=False also considers words that are no longer possible. To keep a turn fast only the best max_guesses
+    # are scored (by model_rank, plus coverage of the remaining words' letters when not in hard mode)
+    # and the answers are sampled down to max_answers. Needs model_rank, so call via next_guess / top_n_by
+    def rank_by_information(self, sort_on: str = 'entropy', hard_mode: bool = True,
+                            max_guesses: int = 500, max_answers: int = 2000) -> pandas.DataFrame:
+        start = time.perf_counter()
+        rows = self.rows
+        guess_rows = rows[top_indices(self.model_rank, max_guesses)]
+        if not hard_mode:
+            letter_scores = numpy.zeros(len(self.word_filter.alphabet))
+            for l, score in self.letter_scores_by_word.items():
+                letter_scores[self.word_filter.alphabet[l]] = score
+            coverage = letter_presence(self.word_filter.encoded, len(letter_scores)) @ letter_scores
+            guess_rows = numpy.array(list(dict.fromkeys(list(guess_rows[:max_guesses // 2]) +
+                                                        list(top_indices(coverage, max_guesses))))[:max_guesses])
+
+        answer_rows = rows
+        if len(rows) > max_answers:
+            answer_rows = numpy.sort(numpy.random.default_rng(0).choice(rows, max_answers, replace=False))
+
+        if self.feedback_table:
+            codes = self.feedback_table.codes[guess_rows][:, answer_rows]
+        else:
+            codes = feedback_codes(self.word_filter.encoded[guess_rows], self.word_filter.encoded[answer_rows])
+        entropy, expected_remaining = information_scores(codes)
+
+        ranked = pandas.DataFrame({'word': self.word_filter.words[guess_rows], 'entropy': entropy,
+                                   'expected_remaining': expected_remaining,
+                                   'is_possible': numpy.isin(guess_rows, rows),
+                                   'model_rank': pandas.Series(self.model_rank, index=rows).reindex(guess_rows).values},
+                                  index=guess_rows)
+        ranked = ranked.sort_values([sort_on, 'is_possible', 'model_rank'], ascending=[sort_on != 'entropy', False, False],
+                                    kind='mergesort', na_position='last')
+        self.rank_timing = {'seconds': time.perf_counter() - start, 'guesses': len(guess_rows), 'answers': len(answer_rows)}
+        return ranked
 
     
     # Calculates the per-letter likelihood of each letter in the remaining possible words
     # This can be thought of as what percent of remaining words contain each letter
-    def update_letter_scores(self) -> float:
+    # Returns the per word feature arrays for the remaining words, in rows order
+    def update_letter_scores(self) -> dict:
+        features = score_features(self.word_filter.encoded[self.rows], self.freq[self.rows], len(self.word_filter.alphabet),
+                                  self.word_filter.letter_codes(self.letters_in), self.word_filter.letter_codes(self.letters_out))
+
+        tables = features['letter_tables']
+        letters = list(self.word_filter.alphabet)
+        present = numpy.flatnonzero(tables['present'])
+        self.letter_scores_by_freq = dict(sorted(((letters[c], tables['by_freq'][c]) for c in present), key=lambda item:item[1], reverse=True))
+        self.letter_scores_by_word = dict(sorted(((letters[c], tables['by_word'][c]) for c in present), key=lambda item:item[1], reverse=True))
+        self.letter_scores_pos_perc = [{letters[c]: tables['pos_perc'][i][c] for c in numpy.flatnonzero(tables['pos_present'][i])}
+                                       for i in range(self.n_letters)]
+        self.letter_scores_pos_freq = [{letters[c]: tables['pos_freq'][i][c] for c in numpy.flatnonzero(tables['pos_present'][i])}
+                                       for i in range(self.n_letters)]
+        return features
+
+    # Original iterrows version of update_letter_scores, used by update_state_pandas
+    def update_letter_scores_pandas(self) -> float:
         words_by_letter = {}
         words_by_letter_weighted = {}
         perc_by_letter = {}
@@ -186,6 +510,7 @@ class wordleSolver:
         return letter_pos_score
 
     # Determines if a given word matches all conditions in current state. Could improve by only evaluating new conditions
+    # No longer used by process_guess (see wordleFilter.matches) but kept as the reference implementation
     def word_in(self, w):
         if 1 in [c in w[0] for c in self.letters_out]:
             return False
@@ -203,7 +528,14 @@ class wordleSolver:
 
 
 # This main runs the solver via command line
+# Note, I picked specific weights for each feature here, which change over time depending on which turn
+# These can be improved by more careful analysis and making a real learning system
+def cli_model_params(turn: int) -> dict:
+    return {'freq':0.2 * turn, 'letter_score_by_word': 0.3/turn, 'letter_score_by_freq': 0.3/turn, 'letter_score_pos_perc': 1.5/turn, 'letter_score_pos_freq': 1.5/turn, 'distinct_letters': 1.2}
+
 if __name__ == '__main__':
+    from wordleTree import load_strategy_tree
+
     # Pick a length of game we're trying to solve
     while True:
         try: 
@@ -215,8 +547,14 @@ if __name__ == '__main__':
         except ValueError:
             print("Please enter an integer from 2 to 15")
 
-    # Setup the wordle solver
+    # Setup the wordle solver. Its suggestions come from the precomputed strategy tree when one has been built
+    # for this length (`python wordleTree.py <n_letters>`), otherwise they're ranked live each turn
     wordle_solver = wordleSolver(n_letters = n_letters)
+    try:
+        wordle_solver.strategy_tree = load_strategy_tree(wordle_solver, model_params = cli_model_params, build = False)
+        wordle_solver.reset()
+    except FileNotFoundError:
+        print(f"No strategy tree built for {n_letters} letter words, ranking guesses live")
 
     game_on = True
 
@@ -227,12 +565,9 @@ if __name__ == '__main__':
     print(f"\n\n---- Starting wordle solver for {n_letters} letter word ----")
 
     turn = 1
-    # Note, I picked specific weights for each feature here, which change over time depending on which turn
-    # These can be improved by more careful analysis and making a real learning system
-    # Also should package the structure for .next_guess and .top_n_by so they use the same weights without copy pasta
     while game_on:
-        print(f"Currently potential matched words is: {len(wordle_solver.possible_words)}")
-        print(f"Top guess based on our model is: {wordle_solver.next_guess(sort_on='model_rank', model_params={'freq':0.2 * turn, 'letter_score_by_word': 0.3/turn, 'letter_score_by_freq': .3/turn, 'letter_score_pos_perc': 1.5/turn, 'letter_score_pos_freq': 1.5/turn, 'distinct_letters': 1.2})}")
+        print(f"Currently potential matched words is: {wordle_solver.n_remaining()}")
+        print(f"Top guess based on our model is: {wordle_solver.next_guess(sort_on='model_rank', model_params=cli_model_params(turn))}")
 
         # Would you like to see more possible words?
         while True:
@@ -244,7 +579,7 @@ if __name__ == '__main__':
 
         if see_top == 'Y':
             print(f"\nTop 20 suggested guesses are:")
-            print(wordle_solver.top_n_by(n=20, sort_on='model_rank', model_params={'freq':0.2 * turn, 'letter_score_by_word': 0.3/turn, 'letter_score_by_freq': 0.3/turn, 'letter_score_pos_perc': 1.5/turn, 'letter_score_pos_freq': 1.5/turn, 'distinct_letters': 1.2}))
+            print(wordle_solver.top_n_by(n=20, sort_on='model_rank', model_params=cli_model_params(turn)))
             print("\n")
         
         # Input guess
@@ -0,0 +1,145 @@
+# Model weight sweeps
+# Replays a fixed list of target words under a grid of model_params (and optionally start words) to compare
+# how many turns each setting takes. The features of a game state don't depend on model_params, only the final
+# model_rank dot product does, so instead of a run_simulation per setting every setting plays the targets together:
+# * states are keyed by the guess / response history, so settings (and targets) that reach the same state share it
+# * each state's features are computed once, and model_rank for every setting is one (words x features) @ (features x settings) product
+# * each state keeps the guess every setting makes from it, so replaying a target walks cached states
+# Guesses match next_guess(sort_on='model_rank'), ties included, apart from near ties where the matrix product
+# rounds differently from next_guess's sum
+
+from collections import defaultdict
+import itertools
+import random
+import numpy
+import pandas
+from wordleCorpus import valid_words
+from wordleGame import score_guesses
+from wordleSolver import wordleSolver
+
+# Every combination of the values in a grid like {'freq': [0.5, 1], 'distinct_letters': [1, 2]}
+def param_grid(grid: dict) -> list:
+    return [dict(zip(grid.keys(), values)) for values in itertools.product(*grid.values())]
+
+# A fixed sample of answers the way wordleGame picks them (one of the 10,000 most common words), reproducible by seed
+def sample_targets(n_letters: int, n: int = 1000, seed: int = 0) -> list:
+    words = valid_words(n_letters).words
+    rng = random.Random(seed)
+    return [words[rng.randint(0, min(10000, len(words) - 1))] for _ in range(n)]
+
+# Index of the highest rank in each column, picked the same way as sorting a Series of that column
+# descending (what next_guess does). NaNs sort last. Only columns with a tie at the top need the Series sort
+def best_rows(ranks: numpy.ndarray) -> numpy.ndarray:
+    filled = numpy.where(numpy.isnan(ranks), -numpy.inf, ranks)
+    best = filled.argmax(axis=0)
+    top = filled[best, numpy.arange(ranks.shape[1])]
+    for col in numpy.flatnonzero(((filled == top).sum(axis=0) > 1) | numpy.isneginf(top)):
+        best[col] = pandas.Series(ranks[:, col]).sort_values(ascending=False).index[0]
+    return best
+
+
+class weightSweep:
+    def __init__(self, n_letters: int, model_params_grid: list, start_words: list = [None], max_turns: int = 20):
+        self.n_letters = n_letters
+        self.max_turns = max_turns
+        self.configs = [{'start_word': start_word, 'model_params': model_params}
+                        for start_word in start_words for model_params in model_params_grid]
+        # (features x settings) weights. A feature missing from a setting's model_params isn't part of its model_rank
+        self.feature_names = sorted(set().union(*[config['model_params'] for config in self.configs]))
+        self.weights = numpy.array([[config['model_params'].get(f, 0) for config in self.configs] for f in self.feature_names], dtype=float)
+        self.uses = numpy.array([[f in config['model_params'] for config in self.configs] for f in self.feature_names])
+        self.first_guesses = [config['start_word'] for config in self.configs]
+        # history -> {'solver': solver in that state, 'guesses': each setting's guess from it, once needed}
+        self.states = {(): {'solver': wordleSolver(n_letters), 'guesses': None}}
+
+    # Each setting's guess from a state, computed for all settings at once the first time the state is reached
+    def state_guesses(self, history: tuple) -> numpy.ndarray:
+        state = self.states[history]
+        if state['guesses'] is None:
+            solver = state['solver']
+            features = solver.scored_features()
+            values = numpy.column_stack([features[f] for f in self.feature_names])
+            missing = numpy.isnan(values)
+            ranks = numpy.where(missing, 0, values) @ self.weights
+            # NaN features only poison the settings that use them, as in rank_words
+            ranks[(missing.astype(int) @ self.uses.astype(int)) > 0] = numpy.nan
+            state['guesses'] = solver.remaining_words()[best_rows(ranks)]
+            # The guesses are all that's needed from here on, so don't keep the feature arrays around
+            solver.features = None
+        return state['guesses']
+
+    def child_state(self, history: tuple, guess: str, response: str) -> tuple:
+        child = history + ((guess, response),)
+        if child not in self.states:
+            solver = self.states[history]['solver'].clone()
+            solver.process_guess(guess, response)
+            self.states[child] = {'solver': solver, 'guesses': None}
+        return child
+
+    # Turns each setting takes to find target, 0 if it didn't within max_turns (or the target isn't a word it can guess)
+    def play(self, target: str) -> numpy.ndarray:
+        turns = numpy.zeros(len(self.configs), dtype=int)
+        active = {(): list(range(len(self.configs)))}
+        for turn in range(1, self.max_turns + 1):
+            moves = []
+            for history, configs in active.items():
+                if len(self.states[history]['solver'].rows) == 0:
+                    continue
+                guesses = self.state_guesses(history)
+                by_guess = defaultdict(list)
+                for c in configs:
+                    by_guess[self.first_guesses[c] if turn == 1 and self.first_guesses[c] else guesses[c]].append(c)
+                moves.extend((history, guess, group) for guess, group in by_guess.items())
+            if not moves:
+                break
+            responses = score_guesses([guess for _, guess, _ in moves], [target] * len(moves), as_strings=True)
+            active = defaultdict(list)
+            for (history, guess, group), response in zip(moves, responses):
+                if response == '+' * self.n_letters:
+                    turns[group] = turn
+                else:
+                    active[self.child_state(history, guess, response)].extend(group)
+        return turns
+
+    # (settings x targets) turns
+    def play_all(self, targets: list) -> numpy.ndarray:
+        if not len(targets):
+            return numpy.zeros((len(self.configs), 0), dtype=int)
+        return numpy.column_stack([self.play(target) for target in targets])
+
+    # One row per setting: its start word and model_params, mean / max turns over the targets it solved,
+    # how many it failed (took more than fail_after turns or didn't finish) and the count of games per number of turns
+    def results(self, targets: list, fail_after: int = 6) -> pandas.DataFrame:
+        turns = self.play_all(targets)
+        # Mean over the games each setting solved, nan for a setting that solved none of them
+        solved_count = (turns > 0).sum(axis=1)
+        mean_turns = numpy.where(solved_count > 0, numpy.where(turns > 0, turns, 0).sum(axis=1) / numpy.maximum(solved_count, 1), numpy.nan)
+        table = pandas.DataFrame({
+            'start_word': [config['start_word'] for config in self.configs],
+            'model_params': [config['model_params'] for config in self.configs],
+            'games': len(targets),
+            'mean_turns': mean_turns,
+            'max_turns': turns.max(axis=1) if len(targets) else 0,
+            'failed': ((turns == 0) | (turns > fail_after)).sum(axis=1),
+        })
+        for t in range(1, self.max_turns + 1):
+            table[f"turns_{t}"] = (turns == t).sum(axis=1)
+        table['unfinished'] = (turns == 0).sum(axis=1)
+        return table
+
+def run_sweep(n_letters: int, model_params_grid: list, targets: list, start_words: list = [None],
+              max_turns: int = 20, fail_after: int = 6) -> pandas.DataFrame:
+    return weightSweep(n_letters, model_params_grid, start_words, max_turns).results(targets, fail_after)
+
+
+if __name__ == '__main__':
+    import time
+    start = time.perf_counter()
+    grid = param_grid({'freq': [0.2, 0.5, 1], 'letter_score_by_word': [0.3, 1], 'letter_score_by_freq': [0.3, 1],
+                       'letter_score_pos_perc': [1, 1.5], 'letter_score_pos_freq': [1, 1.5], 'distinct_letters': [1, 1.2]})
+    results = run_sweep(5, grid, sample_targets(5, 500), start_words=[None, 'tares'])
+    pandas.set_option('display.width', 250)
+    pandas.set_option('display.max_columns', None)
+    pandas.set_option('display.max_colwidth', None)
+    print(results.sort_values(['failed', 'mean_turns']).head(10)[['start_word', 'model_params', 'mean_turns', 'max_turns', 'failed']])
+    print(f"{len(results)} settings x 500 targets in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,137 @@
+# Precomputed strategy trees
+# For a fixed corpus and settings the solver plays deterministically, so its whole strategy is a tree: each node is
+# a game state with the guess the solver makes there, and each response to that guess leads to a child node.
+# build_strategy_tree walks the tree for every answer once (offline, answers sharing a state share the node) and the
+# result is stored as one flat int32 array, memory mapped when loaded:
+#   [n_nodes, n_edges, guesses (n_nodes), offsets (n_nodes + 1), patterns (n_edges), children (n_edges), candidates (n_nodes)]
+# guesses are corpus row ids, candidates the number of words the solver still had possible at each node, and
+# node i's edges are patterns / children[offsets[i]:offsets[i + 1]], sorted by pattern code, so following a
+# response is a binary search in a handful of edges.
+# A solver given a tree (see wordleSolver) answers next_guess with a lookup for as long as the game stays on it
+# Build the tree the command line solver uses with `python wordleTree.py <n_letters>`
+
+import hashlib
+import os
+import sys
+import time
+import numpy
+from wordleFeedback import corpus_hash, decode_response, encode_response, pattern_codes
+from wordleFilter import build_alphabet, encode_words
+from wordleSolver import DEFAULT_MODEL_PARAMS, cli_model_params, wordleSolver
+
+# Bumped whenever the layout or the way trees are built changes so old files aren't reused
+STRATEGY_VERSION = 2
+
+# model_params may be one dict for every turn or a function of the turn (like the CLI's weights)
+def turn_params(model_params, turn: int) -> dict:
+    return model_params(turn) if callable(model_params) else model_params
+
+# Everything a tree depends on besides the corpus
+def strategy_key(sort_on: str, model_params, hard_mode: bool, start_word: str, max_turns: int) -> str:
+    params = [sorted(turn_params(model_params, turn).items()) for turn in range(1, max_turns + 1)]
+    return hashlib.sha1(repr((sort_on, params, hard_mode, start_word, max_turns, STRATEGY_VERSION)).encode('utf-8')).hexdigest()
+
+def strategy_tree_path(n_letters: int, words, key: str) -> str:
+    return f"./start_words/strategy_{n_letters}_letters_{corpus_hash(list(words))[:12]}_{key[:12]}.npy"
+
+
+class strategyTree:
+    def __init__(self, words, n_letters: int, data: numpy.ndarray):
+        self.words = numpy.asarray(words)
+        self.n_letters = n_letters
+        self.corpus_hash = corpus_hash(list(words))
+        self.data = data
+        n_nodes, n_edges = int(data[0]), int(data[1])
+        self.guesses = data[2:2 + n_nodes]
+        self.offsets = data[2 + n_nodes:3 + 2 * n_nodes]
+        self.patterns = data[3 + 2 * n_nodes:3 + 2 * n_nodes + n_edges]
+        self.children = data[3 + 2 * n_nodes + n_edges:3 + 2 * n_nodes + 2 * n_edges]
+        self.candidates = data[3 + 2 * n_nodes + 2 * n_edges:]
+
+    def __len__(self):
+        return len(self.guesses)
+
+    # The solver's guess at a node, or None if it had no words left there
+    def guess(self, node: int) -> str:
+        guess_id = self.guesses[node]
+        return self.words[guess_id] if guess_id >= 0 else None
+
+    # Node reached by playing guess at node and getting response. None when the guess isn't the tree's
+    # or the response never came up for any of the answers the tree was built for
+    def child(self, node: int, guess: str, response) -> int:
+        if self.guess(node) != guess:
+            return None
+        start, end = self.offsets[node], self.offsets[node + 1]
+        code = encode_response(response)
+        i = start + numpy.searchsorted(self.patterns[start:end], code)
+        if i < end and self.patterns[i] == code:
+            return int(self.children[i])
+        return None
+
+    # Write atomically so a concurrent reader never maps a partial file
+    def save(self, path: str):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        numpy.save(tmp_path, numpy.asarray(self.data, dtype=numpy.int32))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, words, n_letters: int):
+        return cls(words, n_letters, numpy.load(path, mmap_mode='r'))
+
+
+# Walk the solver's strategy for every answer (the solver's own corpus by default) breadth first.
+# Nodes are numbered in the order they're visited, so each node's edges are appended contiguously
+def build_strategy_tree(solver, answers: list = None, sort_on: str = 'model_rank', model_params = DEFAULT_MODEL_PARAMS,
+                        hard_mode: bool = True, start_word: str = None, max_turns: int = 20) -> strategyTree:
+    n_letters = solver.n_letters
+    solver.reset()
+    words = solver.remaining_words()
+    word_ids = {w: i for i, w in enumerate(words)}
+    if start_word and start_word not in word_ids:
+        raise ValueError(f"start word {start_word} isn't in the solver's corpus")
+    answers = list(words) if answers is None else list(answers)
+    alphabet = build_alphabet(list(words) + answers)
+    encoded = encode_words(answers, alphabet, n_letters)
+    win = 3 ** n_letters - 1
+
+    guesses, offsets, patterns, children, candidates = [], [0], [], [], []
+    # (solver state, indices of the answers in it, turn). Its position in the queue is its node id
+    queue = [(solver, numpy.arange(len(answers)), 1)]
+    for state, answer_ids, turn in queue:
+        guess = None
+        candidates.append(len(state.rows))
+        if len(state.rows) and turn <= max_turns:
+            guess = start_word if turn == 1 and start_word else state.next_guess(sort_on, turn_params(model_params, turn), hard_mode)
+        guesses.append(word_ids[guess] if guess is not None else -1)
+        if guess is not None:
+            codes = pattern_codes(encode_words([guess], alphabet, n_letters), encoded[answer_ids])
+            for code in numpy.unique(codes[codes != win]):
+                child = state.clone()
+                child.process_guess(guess, decode_response(code, n_letters))
+                patterns.append(int(code))
+                children.append(len(queue))
+                queue.append((child, answer_ids[codes == code], turn + 1))
+            # A node's solver is only needed until its children have been made
+            queue[len(guesses) - 1] = (None, None, turn)
+        offsets.append(len(patterns))
+
+    data = numpy.concatenate([[len(guesses), len(patterns)], guesses, offsets, patterns, children, candidates]).astype(numpy.int32)
+    return strategyTree(words, n_letters, data)
+
+# Open (building first if needed) the tree for a solver's corpus and these settings as a read-only memmap
+def load_strategy_tree(solver, sort_on: str = 'model_rank', model_params = DEFAULT_MODEL_PARAMS, hard_mode: bool = True,
+                       start_word: str = None, max_turns: int = 20, build: bool = True) -> strategyTree:
+    words = solver.start_state['word_filter'].words
+    path = strategy_tree_path(solver.n_letters, words, strategy_key(sort_on, model_params, hard_mode, start_word, max_turns))
+    if not os.path.exists(path):
+        if not build:
+            raise FileNotFoundError(path)
+        build_strategy_tree(solver, None, sort_on, model_params, hard_mode, start_word, max_turns).save(path)
+    return strategyTree.load(path, words, solver.n_letters)
+
+
+if __name__ == '__main__':
+    n_letters = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    start = time.perf_counter()
+    tree = load_strategy_tree(wordleSolver(n_letters), model_params=cli_model_params)
+    print(f"{n_letters} letter strategy tree with {len(tree)} states ready in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,146 @@
+# Worst case analysis of a solving strategy
+# Simulations and wordleEval report averages, which hide the tail: some answer families (`_ight`, `_ills`, ...)
+# take far longer than the mean. This finds, for one strategy (heuristic weights or entropy):
+# * the answers that take the most turns, with the guesses and responses on the way
+# * for each turn, the feedback paths that leave the most candidate words alive
+# * the worst case bound: the most turns any answer takes (or the answers never found)
+# The strategy is the solver's strategy tree (wordleTree), so every game state it can reach is explored once, the
+# result is cached on disk, and later analyses of the same strategy skip straight to the walk. All the answers are
+# walked down the tree together, a turn at a time: one pair_codes call scores every answer against the guess at its
+# current node and one searchsorted over every edge of the tree moves them all to their child nodes.
+# Candidate set sizes are the solver's own count of words still possible at each node, recorded in the tree when it's
+# built. They can be more than the corpus words whose answers reach the node, since the solver's constraints don't
+# use letter counts the way the exact feedback does
+# Run with `python wordleWorstCase.py [n_letters] [sort_on]`
+
+import sys
+import time
+import numpy
+import pandas
+from wordleEval import TOP_ANSWERS, answer_words, summarize_turns
+from wordleFeedback import decode_response, pair_codes
+from wordleSolver import DEFAULT_MODEL_PARAMS, wordleSolver
+from wordleTree import load_strategy_tree
+
+# Parent node and the response that leads to each node of a tree (-1 at the root), and the turn each node's guess is on
+def tree_parents(tree) -> tuple:
+    n_nodes = len(tree)
+    parents = numpy.full(n_nodes, -1)
+    responses = numpy.full(n_nodes, -1)
+    edge_nodes = numpy.repeat(numpy.arange(n_nodes), numpy.diff(tree.offsets))
+    parents[tree.children] = edge_nodes
+    responses[tree.children] = tree.patterns
+    # Children are always numbered after their parent, so one pass in node order fills in every turn
+    turns = numpy.ones(n_nodes, dtype=int)
+    for node in range(1, n_nodes):
+        turns[node] = turns[parents[node]] + 1
+    return parents, responses, turns
+
+# Play every answer through the tree at once. Returns the turn each answer was found on (0 if it never was: it left
+# the tree or the strategy ran out of turns or words) and the node each answer was at on each turn,
+# shape (turns played, len(answers)), -1 once an answer is done
+def walk_answers(tree, answers: list) -> tuple:
+    n_letters = tree.n_letters
+    win = 3 ** n_letters - 1
+    # Every edge as one sorted key, so the child for any (node, response) is a single searchsorted
+    edge_nodes = numpy.repeat(numpy.arange(len(tree), dtype=numpy.int64), numpy.diff(tree.offsets))
+    edge_keys = edge_nodes * (win + 1) + tree.patterns
+    answers = numpy.asarray(answers)
+    turns = numpy.zeros(len(answers), dtype=int)
+    nodes = numpy.zeros(len(answers), dtype=numpy.int64)
+    active = numpy.arange(len(answers))
+    visited = []
+    turn = 1
+    while len(active):
+        node_row = numpy.full(len(answers), -1)
+        node_row[active] = nodes[active]
+        visited.append(node_row)
+        guess_ids = tree.guesses[nodes[active]]
+        playing = guess_ids >= 0
+        active = active[playing]
+        codes = pair_codes(list(tree.words[guess_ids[playing]]), list(answers[active])).astype(numpy.int64)
+        turns[active[codes == win]] = turn
+        active, codes = active[codes != win], codes[codes != win]
+        keys = nodes[active] * (win + 1) + codes
+        edges = numpy.minimum(numpy.searchsorted(edge_keys, keys), len(edge_keys) - 1)
+        found = edge_keys[edges] == keys if len(edge_keys) else numpy.zeros(len(keys), dtype=bool)
+        active = active[found]
+        nodes[active] = tree.children[edges[found]]
+        turn += 1
+    return turns, numpy.array(visited).reshape(len(visited), len(answers))
+
+# The guesses and responses leading from the root to a node, e.g. [('tares', '__-_+'), ...]
+def node_path(tree, parents: numpy.ndarray, responses: numpy.ndarray, node: int) -> list:
+    path = []
+    while parents[node] >= 0:
+        parent = parents[node]
+        path.append((tree.guess(parent), decode_response(int(responses[node]), tree.n_letters)))
+        node = parent
+    return path[::-1]
+
+def format_path(path: list) -> str:
+    return ' > '.join(f"{guess} {response}" for guess, response in path)
+
+# Worst case report for a strategy against the top_k most common words (or a given list of answers).
+# Returns the summarize_turns numbers plus
+#   'turn_counts': how many answers took each number of turns (0 = never found)
+#   'worst_answers': the n_worst answers taking the most turns, with the path the strategy takes to each
+#   'largest_sets': for each turn, the n_paths nodes with the most candidate words still alive when that turn's guess
+#                   is made, with the path there, the number of answers reaching it and some of the corpus words that do
+def worst_case(n_letters: int = 5, answers: list = None, top_k: int = TOP_ANSWERS, sort_on: str = 'model_rank',
+               model_params = DEFAULT_MODEL_PARAMS, hard_mode: bool = True, start_word: str = None, max_turns: int = 20,
+               fail_after: int = 6, n_worst: int = 20, n_paths: int = 5, n_words: int = 10,
+               solver: wordleSolver = None, build: bool = True) -> dict:
+    start = time.perf_counter()
+    solver = solver or wordleSolver(n_letters)
+    tree = load_strategy_tree(solver, sort_on, model_params, hard_mode, start_word, max_turns, build)
+    tree_seconds = time.perf_counter() - start
+    answers = answer_words(n_letters, top_k) if answers is None else list(answers)
+    parents, responses, node_turns = tree_parents(tree)
+
+    turns, visited = walk_answers(tree, answers)
+    # Where each answer was last: the node it was found at, or where it dropped out
+    last_nodes = visited[(visited >= 0).sum(axis=0) - 1, numpy.arange(len(answers))] if len(answers) else numpy.array([], dtype=int)
+    order = numpy.lexsort((numpy.arange(len(answers)), -numpy.where(turns == 0, max_turns + 1, turns)))[:n_worst]
+    worst_answers = pandas.DataFrame({
+        'word': [answers[i] for i in order],
+        'turns': turns[order],
+        'path': [format_path(node_path(tree, parents, responses, last_nodes[i]) +
+                             ([(tree.guess(last_nodes[i]), '+' * n_letters)] if turns[i] else [])) for i in order]})
+
+    # Candidates alive at each node as the solver counted them, answers reaching it from the answer walk and
+    # example words from walking the whole corpus
+    candidates = numpy.asarray(tree.candidates)
+    corpus = tree.words
+    _, corpus_visited = walk_answers(tree, corpus)
+    reached = numpy.bincount(visited[visited >= 0], minlength=len(tree))
+    largest = []
+    for turn in range(2, node_turns.max() + 1 if len(tree) else 0):
+        at_turn = numpy.flatnonzero(node_turns == turn)
+        for node in at_turn[numpy.lexsort((at_turn, -candidates[at_turn]))][:n_paths]:
+            turn_nodes = corpus_visited[turn - 1] if turn <= len(corpus_visited) else numpy.array([])
+            largest.append({'turn': turn, 'candidates': int(candidates[node]), 'answers': int(reached[node]),
+                            'path': format_path(node_path(tree, parents, responses, node)),
+                            'words': ' '.join(corpus[turn_nodes == node][:n_words])})
+    largest_sets = pandas.DataFrame(largest, columns=['turn', 'candidates', 'answers', 'path', 'words'])
+
+    counts = numpy.bincount(turns)
+    return {**summarize_turns(turns, fail_after), 'turn_counts': {t: int(c) for t, c in enumerate(counts) if c},
+            'worst_answers': worst_answers, 'largest_sets': largest_sets, 'tree_nodes': len(tree),
+            'tree_seconds': tree_seconds, 'seconds': time.perf_counter() - start}
+
+
+if __name__ == '__main__':
+    n_letters = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sort_on = sys.argv[2] if len(sys.argv) > 2 else 'model_rank'
+    result = worst_case(n_letters, sort_on=sort_on)
+    print(f"{n_letters} letters, {sort_on}: {result['games']} answers in {result['seconds']:.1f}s "
+          f"({result['tree_nodes']} states, {result['tree_seconds']:.1f}s for the strategy tree)")
+    print(f"worst case {result['max_turns']} turns, unfinished {result['unfinished']}, mean {result['mean_turns']:.3f}, "
+          f"failure rate (> 6 turns) {result['failure_rate']:.2%}")
+    print(f"answers per turn count: {result['turn_counts']}")
+    with pandas.option_context('display.max_colwidth', None, 'display.width', 250):
+        print("\nmost turns:")
+        print(result['worst_answers'].to_string(index=False))
+        print("\nlargest candidate sets alive:")
+        print(result['largest_sets'].to_string(index=False))